@@ -0,0 +1,87 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+class AnalysisCache:
+    # Results keyed by (section, params) and tagged with the data version they were computed at.
+    # An entry is only served while the database is still at that version. On disk the entries
+    # live under the database's random id, since a recreated file starts its version from 0 again.
+    def __init__(self, max_entries=32, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def for_database(cls, db_manager):
+        config = db_manager.config
+        directory = None
+        if config["analysis_disk_cache"] and not db_manager.in_memory:
+            directory = os.path.join(db_manager.db_path + ".cache", f"{db_manager.database_id:016x}")
+        return cls(config["analysis_cache_entries"], directory)
+
+    def get(self, section, version, params=()):
+        key = (section, params)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(key)
+                return entry[1]
+
+        entry = self.load(key)
+        if entry is not None and entry[0] == version:
+            self.remember(key, entry)
+            return entry[1]
+        return None
+
+    def put(self, section, version, value, params=()):
+        key = (section, params)
+        self.remember(key, (version, value))
+        self.save(key, (version, value))
+
+    def get_or_compute(self, section, version, compute, params=()):
+        value = self.get(section, version, params)
+        if value is None:
+            value = compute()
+            self.put(section, version, value, params)
+        return value
+
+    def remember(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def path(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"{key[0]}-{digest}.pickle")
+
+    def load(self, key):
+        if self.directory is None:
+            return None
+        try:
+            with open(self.path(key), "rb") as file:
+                return pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Missing or unreadable entries are just cache misses
+            return None
+
+    def save(self, key, entry):
+        if self.directory is None:
+            return
+        path = self.path(key)
+        try:
+            with open(path + ".tmp", "wb") as file:
+                pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + ".tmp", path)
+        except OSError:
+            pass
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
@@ -0,0 +1,140 @@
+from collections import defaultdict
+from db.profiles import aggregate_matchup_stats
+
+MATCHUP_COLUMNS = ("my_paragon", "opp_paragon", "otp_matches", "otp_wins", "otd_matches", "otd_wins")
+
+TABLE_COLUMNS = ("Opp's Paragon", "Total Matches", "Total Winrate", "OTP Matches", "OTP Wins", "OTP Winrate",
+                 "OTD Matches", "OTD Wins", "OTD Winrate")
+
+GROUPED_QUERY = '''
+    SELECT my_paragon, opp_paragon, turn_order, COUNT(*), SUM(result = 'WIN')
+    FROM records GROUP BY my_paragon, opp_paragon, turn_order
+'''
+
+def winrate(wins, matches):
+    return (wins / matches * 100) if matches > 0 else 0.0
+
+class MatchupMatrix:
+    # Columnar matchup counts: one entry per (my_paragon, opp_paragon), sorted by both names
+    def __init__(self, columns):
+        self.columns = columns
+
+    @classmethod
+    def from_grouped(cls, grouped):
+        # grouped yields (my_paragon, opp_paragon, turn_order, matches, wins)
+        counts = {}
+        for my_paragon, opp_paragon, turn_order, matches, wins in grouped:
+            entry = counts.setdefault((my_paragon, opp_paragon), [0, 0, 0, 0])
+            offset = 0 if turn_order == "OTP" else 2
+            entry[offset] += matches
+            entry[offset + 1] += wins
+
+        columns = {name: [] for name in MATCHUP_COLUMNS}
+        for (my_paragon, opp_paragon), entry in sorted(counts.items()):
+            columns["my_paragon"].append(my_paragon)
+            columns["opp_paragon"].append(opp_paragon)
+            columns["otp_matches"].append(entry[0])
+            columns["otp_wins"].append(entry[1])
+            columns["otd_matches"].append(entry[2])
+            columns["otd_wins"].append(entry[3])
+        return cls(columns)
+
+    def __len__(self):
+        return len(self.columns["my_paragon"])
+
+    def rows(self):
+        return zip(*(self.columns[name] for name in MATCHUP_COLUMNS))
+
+    def my_paragons(self):
+        return list(dict.fromkeys(self.columns["my_paragon"]))
+
+    def grid(self, my_paragons, opp_paragons):
+        # (matches, wins) as arrays of shape (len(my_paragons), len(opp_paragons), 2), OTP then OTD
+        import numpy as np
+
+        rows = {name: index for index, name in enumerate(my_paragons)}
+        columns = {name: index for index, name in enumerate(opp_paragons)}
+        matches = np.zeros((len(rows), len(columns), 2), dtype=np.int64)
+        wins = np.zeros_like(matches)
+        for my_paragon, opp_paragon, otp_matches, otp_wins, otd_matches, otd_wins in self.rows():
+            row = rows.get(my_paragon)
+            column = columns.get(opp_paragon)
+            if row is not None and column is not None:
+                matches[row, column] = (otp_matches, otd_matches)
+                wins[row, column] = (otp_wins, otd_wins)
+        return matches, wins
+
+    def table_rows(self, my_paragon):
+        # Rows for one paragon's table, the "Overall" total first, formatted for display or export
+        matchups = [row for row in self.rows() if row[0] == my_paragon]
+        totals = [sum(row[i] for row in matchups) for i in range(2, 6)]
+        table = [format_table_row("Overall", *totals)]
+        for row in matchups:
+            table.append(format_table_row(row[1], *row[2:]))
+        return table
+
+def format_table_row(label, otp_matches, otp_wins, otd_matches, otd_wins):
+    total_matches = otp_matches + otd_matches
+    total_wins = otp_wins + otd_wins
+    return (
+        label,
+        total_matches,
+        f"{winrate(total_wins, total_matches):.1f}%",
+        otp_matches,
+        otp_wins,
+        f"{winrate(otp_wins, otp_matches):.1f}%",
+        otd_matches,
+        otd_wins,
+        f"{winrate(otd_wins, otd_matches):.1f}%",
+    )
+
+def matchup_matrix(db_manager):
+    # Read from the trigger-maintained summary: cost is O(number of matchups)
+    return MatchupMatrix.from_grouped(db_manager.get_matchup_stats())
+
+def matchup_matrix_sql(db_manager):
+    # Single GROUP BY over the raw rows, for databases without a trusted summary
+    return MatchupMatrix.from_grouped(db_manager.fetch_all(GROUPED_QUERY))
+
+def matchup_matrix_pandas(db_manager):
+    import pandas as pd
+
+    df = pd.read_sql("SELECT my_paragon, opp_paragon, turn_order, result FROM records", db_manager.reader())
+    df["win"] = df["result"] == "WIN"
+    grouped = df.groupby(["my_paragon", "opp_paragon", "turn_order"], sort=False)["win"].agg(["size", "sum"])
+    return MatchupMatrix.from_grouped(
+        (my_paragon, opp_paragon, turn_order, int(size), int(wins))
+        for (my_paragon, opp_paragon, turn_order), size, wins in zip(grouped.index, grouped["size"], grouped["sum"])
+    )
+
+def matchup_matrix_loop(records):
+    # The original per-record Python aggregation, kept as the benchmark baseline
+    paragon_stats = defaultdict(lambda: defaultdict(lambda: {
+        'otp_matches': 0, 'otp_wins': 0, 'otd_matches': 0, 'otd_wins': 0
+    }))
+
+    for record in records:
+        my_paragon = record[1]
+        opp_paragon = record[2]
+        turn_order = record[3]
+        is_win = record[4] == "WIN"
+
+        if turn_order == "OTP":
+            paragon_stats[my_paragon][opp_paragon]['otp_matches'] += 1
+            if is_win:
+                paragon_stats[my_paragon][opp_paragon]['otp_wins'] += 1
+        else:  # OTD
+            paragon_stats[my_paragon][opp_paragon]['otd_matches'] += 1
+            if is_win:
+                paragon_stats[my_paragon][opp_paragon]['otd_wins'] += 1
+
+    return MatchupMatrix.from_grouped(
+        (my_paragon, opp_paragon, turn_order, stats[f'{prefix}_matches'], stats[f'{prefix}_wins'])
+        for my_paragon, opponents in paragon_stats.items()
+        for opp_paragon, stats in opponents.items()
+        for turn_order, prefix in (("OTP", "otp"), ("OTD", "otd"))
+    )
+
+def matchup_matrix_profiles(db_paths):
+    # Combined matrix over several profile databases, summed from their matchup_stats
+    return MatchupMatrix.from_grouped(aggregate_matchup_stats(db_paths))
@@ -0,0 +1,73 @@
+import numpy as np
+from utils.profiling import timed_query
+
+MMR_FLOOR = 1000
+
+class MMRSeries:
+    # Chronological MMR history as arrays: position, MMR and the dd/mm/YYYY label of each game
+    def __init__(self, mmr, dates):
+        self.mmr = mmr
+        self.dates = dates
+        self.x = np.arange(len(mmr), dtype=np.float64)
+
+    def __len__(self):
+        return len(self.mmr)
+
+    def extends(self, other):
+        # True when this series is other plus games appended at the end
+        return (other is not None and len(self) > len(other) > 0
+                and np.array_equal(self.mmr[:len(other)], other.mmr)
+                and np.array_equal(self.dates[:len(other)], other.dates))
+
+    def window(self, start, stop, threshold):
+        # Points in [start, stop) reduced to about threshold points for drawing
+        start = max(int(np.floor(start)), 0)
+        stop = min(int(np.ceil(stop)) + 1, len(self))
+        if stop - start <= threshold:
+            return self.x[start:stop], self.mmr[start:stop]
+        indices = lttb(self.x[start:stop], self.mmr[start:stop], threshold) + start
+        return self.x[indices], self.mmr[indices]
+
+@timed_query("analytics.load_mmr_series")
+def load_mmr_series(db_manager, batch_size=50000):
+    # Only include MMR > 1000, ordered by the date index
+    cursor = db_manager.reader().cursor()
+    cursor.execute("SELECT my_mmr, date FROM records WHERE my_mmr > ? ORDER BY date_iso, id", (MMR_FLOOR,))
+    mmr_chunks = []
+    date_chunks = []
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        mmr, dates = zip(*rows)
+        mmr_chunks.append(np.fromiter(mmr, dtype=np.int32, count=len(rows)))
+        date_chunks.append(np.array(dates, dtype=object))
+    if not mmr_chunks:
+        return MMRSeries(np.empty(0, dtype=np.int32), np.empty(0, dtype=object))
+    return MMRSeries(np.concatenate(mmr_chunks), np.concatenate(date_chunks))
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: indices of threshold points that keep the visual shape
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    y = y.astype(np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        # Average of the next bucket is the third corner of the triangle
+        next_start, next_stop = stop, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[next_start:next_stop].mean()
+        next_y = y[next_start:next_stop].mean()
+
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
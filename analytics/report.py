@@ -0,0 +1,155 @@
+import html
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.parse import quote
+import numpy as np
+from db.db_manager import DatabaseManager
+from db.migrations import SCHEMA_VERSION
+from analytics.matchups import matchup_matrix, TABLE_COLUMNS
+from analytics.mmr import MMR_FLOOR, lttb
+from analytics.trends import load_game_series
+
+# Points drawn in the report chart; the full history is reduced with LTTB first
+CHART_POINTS = 2000
+BAND_WIDTH = 100
+WEEK_COLUMNS = ("Week", "Matches", "Wins", "Winrate")
+BAND_COLUMNS = ("MMR", "Matches", "Wins", "Winrate")
+
+PAGE = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: Arial, sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; margin-bottom: 1.5em; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 10px; text-align: center; }}
+th {{ background: #eee; }}
+tr.total td {{ background: lightgray; font-weight: bold; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<p>{summary}</p>
+{body}
+</body>
+</html>
+'''
+
+def render_table(columns, rows, total_first=False):
+    lines = ["<table>", "<tr>" + "".join(f"<th>{html.escape(str(col))}</th>" for col in columns) + "</tr>"]
+    for index, row in enumerate(rows):
+        css = ' class="total"' if total_first and index == 0 else ""
+        lines.append(f"<tr{css}>" + "".join(f"<td>{html.escape(str(value))}</td>" for value in row) + "</tr>")
+    lines.append("</table>")
+    return "\n".join(lines)
+
+def render_mmr_chart(games, path):
+    # Agg draws straight to a file: no display, no pyplot global state, safe in worker processes
+    try:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+    except ImportError:
+        raise ValueError("PNG charts require the matplotlib package")
+
+    valid = games.mmr > MMR_FLOOR
+    mmr = games.mmr[valid]
+    dates = games.dates()[valid]
+    x = np.arange(len(mmr), dtype=np.float64)
+    indices = lttb(x, mmr, CHART_POINTS)
+
+    figure = Figure(figsize=(12, 6))
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+    ax.plot(x[indices], mmr[indices], linewidth=2)
+    ax.set_title('MMR changes', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Date', fontsize=12)
+    ax.set_ylabel('MMR', fontsize=12)
+    ticks = np.linspace(0, max(len(mmr) - 1, 0), min(len(mmr), 10)).astype(np.int64)
+    ax.set_xticks(ticks)
+    ax.set_xticklabels([str(dates[tick]) for tick in ticks], rotation=45)
+    ax.grid(True, alpha=0.3)
+    figure.tight_layout()
+    figure.savefig(path, dpi=100)
+
+def schema_version(db_path):
+    conn = sqlite3.connect("file:" + quote(os.path.abspath(db_path)) + "?mode=ro", uri=True)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+def build_report(db_path, output_dir, charts=True):
+    # Writes output_dir/report.html (and mmr.png) for one database; returns the HTML path
+    if not os.path.exists(db_path):
+        # DatabaseManager would create an empty database instead
+        raise FileNotFoundError(f"No database at {db_path}")
+    # A report must not change the files it reads, and DatabaseManager would migrate an old one
+    version = schema_version(db_path)
+    if version < SCHEMA_VERSION:
+        raise ValueError(f"schema version {version} is older than {SCHEMA_VERSION}, open it once to migrate it")
+    os.makedirs(output_dir, exist_ok=True)
+    db_manager = DatabaseManager(db_path)
+    try:
+        matrix = matchup_matrix(db_manager)
+        games = load_game_series(db_manager)
+    finally:
+        db_manager.close()
+
+    title = f"Game Data Analysis: {os.path.basename(db_path)}"
+    wins = int(games.wins.sum())
+    summary = f"{len(games)} matches, {wins} wins"
+    if len(games):
+        summary += f" ({wins * 100.0 / len(games):.1f}%)"
+
+    body = []
+    for my_paragon in matrix.my_paragons():
+        body.append(f"<h2>{html.escape(my_paragon)} Analysis</h2>")
+        body.append(render_table(TABLE_COLUMNS, matrix.table_rows(my_paragon), total_first=True))
+
+    if charts and len(games):
+        render_mmr_chart(games, os.path.join(output_dir, "mmr.png"))
+        body.append('<h2>MMR Changes</h2>\n<img src="mmr.png" alt="MMR changes">')
+
+    body.append("<h2>Winrate by MMR band</h2>")
+    body.append(render_table(BAND_COLUMNS, [(f"{start}-{start + BAND_WIDTH - 1}", matches, won, f"{rate:.1f}%")
+                                            for start, matches, won, rate in games.by_mmr_band(BAND_WIDTH)]))
+    body.append("<h2>Winrate by week</h2>")
+    body.append(render_table(WEEK_COLUMNS, [(week, matches, won, f"{rate:.1f}%")
+                                            for week, matches, won, rate in reversed(games.by_week())]))
+
+    path = os.path.join(output_dir, "report.html")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(PAGE.format(title=html.escape(title), summary=html.escape(summary), body="\n".join(body)))
+    return path
+
+def report_dir(output_dir, db_path, many):
+    # One sub-directory per database when several are processed together
+    if not many:
+        return output_dir
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(db_path))[0])
+
+def generate_reports(db_paths, output_dir, workers=None, charts=True):
+    # Each database is handled by its own process; yields (db_path, html_path, error, seconds)
+    many = len(db_paths) > 1
+    if not many or workers == 1:
+        for db_path in db_paths:
+            yield run_report(db_path, report_dir(output_dir, db_path, many), charts)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_report, db_path, report_dir(output_dir, db_path, many), charts)
+                   for db_path in db_paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+def run_report(db_path, output_dir, charts):
+    start = time.perf_counter()
+    try:
+        path = build_report(db_path, output_dir, charts)
+    except Exception as e:
+        # Reported per database so one broken file does not stop the batch
+        return db_path, None, f"{type(e).__name__}: {e}", time.perf_counter() - start
+    return db_path, path, None, time.perf_counter() - start
@@ -0,0 +1,109 @@
+import numpy as np
+from analytics.mmr import MMR_FLOOR
+from db.schema import TURN_ORDER_CODES
+from utils.profiling import timed_query
+
+# Day numbers count from 1970-01-01, a Thursday; shifting by 3 makes weeks start on Monday
+WEEK_OFFSET = 3
+
+GAMES_QUERY = '''
+    SELECT CAST(julianday(date_iso) - 2440587.5 AS INTEGER), result_code, my_mmr,
+           my_paragon_id, opp_paragon_id, turn_order_code
+    FROM records WHERE date_iso IS NOT NULL ORDER BY date_iso, id
+'''
+
+class GameSeries:
+    # Every game in date order as numpy columns plus a prefix sum of wins, so the win rate of
+    # any contiguous window is two lookups. Loaded once per data version; moving a slider
+    # recomputes from these arrays and never goes back to SQL.
+    def __init__(self, days, wins, mmr, my_paragon, opp_paragon, turn_order, paragon_ids):
+        self.days = days
+        self.wins = wins
+        self.mmr = mmr
+        self.my_paragon = my_paragon
+        self.opp_paragon = opp_paragon
+        self.turn_order = turn_order
+        self.paragon_ids = paragon_ids
+        self.cum_wins = np.concatenate(([0], np.cumsum(wins, dtype=np.int64)))
+        self.subsets = {}
+
+    def __len__(self):
+        return len(self.days)
+
+    def select(self, my_paragon=None, opp_paragon=None, turn_order=None):
+        # Games of one matchup and/or turn order, computed once per filter and reused
+        key = (my_paragon, opp_paragon, turn_order)
+        if key == (None, None, None):
+            return self
+        subset = self.subsets.get(key)
+        if subset is None:
+            mask = np.ones(len(self), dtype=bool)
+            filters = ((self.my_paragon, my_paragon, self.paragon_ids),
+                       (self.opp_paragon, opp_paragon, self.paragon_ids),
+                       (self.turn_order, turn_order, TURN_ORDER_CODES))
+            for column, value, codes in filters:
+                if value is not None:
+                    # Unknown names match nothing
+                    mask &= column == codes.get(value, -1)
+            subset = GameSeries(self.days[mask], self.wins[mask], self.mmr[mask], self.my_paragon[mask],
+                                self.opp_paragon[mask], self.turn_order[mask], self.paragon_ids)
+            self.subsets[key] = subset
+        return subset
+
+    def window_rates(self, starts):
+        # Win rate in percent of games [starts[i], i] for every game i
+        ends = np.arange(1, len(self) + 1)
+        return (self.cum_wins[ends] - self.cum_wins[starts]) * 100.0 / (ends - starts)
+
+    def rolling_games(self, games):
+        # Win rate over the last `games` games at each point
+        return self.window_rates(np.maximum(np.arange(len(self)) + 1 - games, 0))
+
+    def rolling_days(self, days):
+        # Win rate over the games played in the last `days` days, counting the current day
+        return self.window_rates(np.searchsorted(self.days, self.days - days + 1, side="left"))
+
+    def dates(self):
+        return self.days.astype("datetime64[D]")
+
+    def by_mmr_band(self, width):
+        # (band_start, games, wins, winrate) for each MMR band of `width` that has games
+        valid = self.mmr > MMR_FLOOR
+        bands, inverse = np.unique(self.mmr[valid] // width, return_inverse=True)
+        games = np.bincount(inverse, minlength=len(bands))
+        wins = np.bincount(inverse, weights=self.wins[valid], minlength=len(bands)).astype(np.int64)
+        return [(int(band) * width, int(count), int(won), float(won * 100.0 / count))
+                for band, count, won in zip(bands, games, wins)]
+
+    def by_week(self):
+        # (week_start, games, wins, winrate) per calendar week, oldest first
+        if not len(self):
+            return []
+        weeks = (self.days + WEEK_OFFSET) // 7
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(weeks)) + 1))
+        games = np.diff(np.append(starts, len(self)))
+        wins = self.cum_wins[starts + games] - self.cum_wins[starts]
+        week_starts = (weeks[starts] * 7 - WEEK_OFFSET).astype("datetime64[D]")
+        return [(str(week), int(count), int(won), float(won * 100.0 / count))
+                for week, count, won in zip(week_starts, games, wins)]
+
+@timed_query("analytics.load_game_series")
+def load_game_series(db_manager, batch_size=50000):
+    store = db_manager.column_store()
+    if store is not None:
+        games = store.games()
+        return GameSeries(games["day"].astype(np.int64), games["result"], games["my_mmr"], games["my_paragon"],
+                          games["opp_paragon"], games["turn_order"], store.codes["my_paragon"])
+    cursor = db_manager.reader().cursor()
+    cursor.execute(GAMES_QUERY)
+    chunks = []
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        chunks.append(np.array(rows, dtype=np.int64))
+    columns = np.concatenate(chunks) if chunks else np.empty((0, 6), dtype=np.int64)
+    paragon_ids = {name: id for id, name in db_manager.fetch_all("SELECT id, name FROM paragons")}
+    return GameSeries(columns[:, 0], columns[:, 1].astype(np.int8), columns[:, 2].astype(np.int32),
+                      columns[:, 3].astype(np.int16), columns[:, 4].astype(np.int16),
+                      columns[:, 5].astype(np.int8), paragon_ids)
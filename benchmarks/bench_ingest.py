@@ -0,0 +1,58 @@
+# Submissions per second through the local ingestion server, one record per request, from
+# several client threads each holding a keep-alive connection. Run from the repository root:
+#   python -m benchmarks.bench_ingest [--clients 8] [--submissions 2000]
+import argparse
+import os
+import sys
+import threading
+import time
+from db.db_manager import DatabaseManager
+from ingest.client import IngestClient
+from ingest.server import IngestServer, write_records
+from benchmarks.synthetic import generate_records
+
+def run_clients(port, records, clients):
+    def submit(chunk):
+        client = IngestClient(port)
+        for record in chunk:
+            client.submit([record])
+        client.close()
+
+    threads = [threading.Thread(target=submit, args=(records[index::clients],)) for index in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ingestion server")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--submissions", type=int, default=2000)
+    parser.add_argument("--data-dir", default=os.path.join("benchmarks", "data"))
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    path = os.path.join(args.data_dir, "ingest.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    db_manager = DatabaseManager(path)
+    server = IngestServer(lambda records: write_records(db_manager, records), port=0)
+    port = server.start()
+    try:
+        records = list(generate_records(args.submissions))
+        seconds = run_clients(port, records, args.clients)
+    finally:
+        server.stop()
+
+    stored = db_manager.fetch_all("SELECT COUNT(*) FROM records")[0][0]
+    db_manager.close()
+    print(f"{args.submissions} submissions from {args.clients} clients in {seconds:.2f}s: "
+          f"{args.submissions / seconds:.0f}/s, {server.batches} transactions, {stored} records stored")
+    return 0 if stored == args.submissions else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
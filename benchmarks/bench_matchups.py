@@ -0,0 +1,44 @@
+# Compares the original per-record loop against the SQL and pandas matchup paths.
+# Run from the repository root: python -m benchmarks.bench_matchups [sizes...]
+import sys
+import time
+from db.db_manager import DatabaseManager
+from analytics.matchups import matchup_matrix, matchup_matrix_sql, matchup_matrix_pandas, matchup_matrix_loop
+from benchmarks.synthetic import populate
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def loop_path(db_manager):
+    return matchup_matrix_loop(db_manager.get_all_records())
+
+def run(sizes):
+    paths = [("python loop", loop_path), ("sql group by", matchup_matrix_sql),
+             ("pandas groupby", matchup_matrix_pandas), ("matchup_stats", matchup_matrix)]
+    print(f"{'records':>10}  " + "  ".join(f"{name:>15}" for name, _ in paths))
+    for size in sizes:
+        db_manager = DatabaseManager(":memory:")
+        populate(db_manager, size)
+
+        timings = []
+        expected = None
+        for name, path in paths:
+            try:
+                elapsed, matrix = timed(path, db_manager)
+            except ImportError:
+                timings.append(f"{'n/a':>15}")
+                continue
+            if expected is None:
+                expected = matrix.columns
+            elif matrix.columns != expected:
+                raise AssertionError(f"{name} disagrees with the python loop at {size} records")
+            timings.append(f"{elapsed * 1000:>13.1f}ms")
+        print(f"{size:>10}  " + "  ".join(timings))
+        db_manager.close()
+
+if __name__ == "__main__":
+    run([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,92 @@
+# Startup budget check: imports main.py under -X importtime in a fresh interpreter and fails
+# when the import time goes over budget or an analysis-only dependency is loaded eagerly.
+# Run from the repository root: python -m benchmarks.bench_startup [--budget-ms 600] [--window]
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+DEFAULT_BUDGET_MS = 600
+
+# Only needed by the analysis screen, which loads them on first use
+LAZY_MODULES = ("numpy", "pandas", "matplotlib", "pyarrow")
+
+# Builds the main window against an in-memory database and stops at the first idle event
+WINDOW_SCRIPT = '''
+import time
+start = time.perf_counter()
+from ui.ui_manager import UIManager
+app = UIManager(":memory:")
+app.root.update()
+print(f"window {(time.perf_counter() - start) * 1000:.1f}")
+app.executor.shutdown()
+app.root.destroy()
+'''
+
+def run_python(args):
+    env = dict(os.environ, PST_PREWARM_ANALYSIS="0")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.run([sys.executable, *args], cwd=root, env=env, capture_output=True, text=True)
+
+def parse_importtime(stderr):
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        name = fields[2].rstrip()
+        modules.append((int(fields[0]), int(fields[1]), name.strip(), len(name) - len(name.lstrip())))
+    return modules
+
+def measure_imports():
+    start = time.perf_counter()
+    process = run_python(["-X", "importtime", "-c", "import main"])
+    wall = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1])
+    return wall, parse_importtime(process.stderr)
+
+def measure_window():
+    process = run_python(["-c", WINDOW_SCRIPT])
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1])
+    return float(process.stdout.split()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the startup time budget")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="maximum cumulative import time of main.py")
+    parser.add_argument("--window", action="store_true", help="also time building the first window (needs a display)")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest imports to list")
+    args = parser.parse_args(argv)
+
+    wall, modules = measure_imports()
+    # Cumulative time of the top-level "main" entry covers everything main.py pulls in
+    top_level = [module for module in modules if module[3] == 1]
+    total_ms = next(module[1] for module in top_level if module[2] == "main") / 1000
+    print(f"import main: {total_ms:.1f}ms in imports, {wall * 1000:.1f}ms process wall time")
+    # Self time points at the module that is actually slow rather than whoever imported it
+    for self_us, cumulative_us, name, _ in sorted(modules, key=lambda module: -module[0])[:args.top]:
+        print(f"  {self_us / 1000:>8.1f}ms self {cumulative_us / 1000:>8.1f}ms cumulative  {name}")
+
+    failures = []
+    eager = sorted({name.split(".")[0] for _, _, name, _ in modules if name.split(".")[0] in LAZY_MODULES})
+    if eager:
+        failures.append(f"analysis dependencies imported at startup: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.1f}ms is over the {args.budget_ms:.0f}ms budget")
+
+    if args.window:
+        window_ms = measure_window()
+        print(f"first window: {window_ms:.1f}ms")
+        if window_ms > args.budget_ms * 2:
+            failures.append(f"first window took {window_ms:.1f}ms, over {args.budget_ms * 2:.0f}ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+# Repeatable timings of the storage, search, analysis and table paths on synthetic databases.
+# Run from the repository root:
+#   python -m benchmarks.suite --sizes 1000 100000 --output results.json [--compare previous.json]
+# Databases are generated once per (size, seed) under --data-dir and reused by later runs.
+# Treeview population drives RecordTable against an in-memory tree so it runs without a display.
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime
+from db.db_manager import DatabaseManager
+from db.search import SearchPlanner, ColumnFilter
+from db.column_store import ColumnStore
+from analytics.matchups import matchup_matrix, matchup_matrix_sql
+from analytics.mmr import load_mmr_series
+from analytics.trends import load_game_series
+from ui.record_table import RecordTable
+from benchmarks.synthetic import build_database, generate_records
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+SEARCHES = ("opp:Arak", "result:LOSE turn:OTP", "mmr:1500..1600", "date:>=01/06/2024", "Brand",
+            "opp:Arak turn:OTD result:WIN mmr:>1700")
+CHART_WIDTH = 1200
+
+class ListTree:
+    # The subset of ttk.Treeview that RecordTable uses, backed by a list
+    def __init__(self):
+        self.rows = {}
+        self.order = []
+        self.top = 0.0
+
+    def configure(self, **kwargs):
+        pass
+
+    def get_children(self):
+        return tuple(self.order)
+
+    def insert(self, parent, index, iid, values):
+        self.rows[iid] = values
+        if index == "end":
+            self.order.append(iid)
+        else:
+            self.order.insert(index, iid)
+
+    def delete(self, *iids):
+        removed = set(iids)
+        self.order = [iid for iid in self.order if iid not in removed]
+        for iid in iids:
+            del self.rows[iid]
+
+    def exists(self, iid):
+        return iid in self.rows
+
+    def item(self, iid, values=None):
+        if values is not None:
+            self.rows[iid] = values
+        return {"values": self.rows[iid]}
+
+    def yview(self):
+        return (self.top, 1.0)
+
+    def yview_moveto(self, fraction):
+        self.top = fraction
+
+class NullScrollbar:
+    def set(self, first, last):
+        pass
+
+class InlineTask:
+    cancelled = False
+
+    def check(self):
+        pass
+
+    def progress(self, value):
+        pass
+
+class InlineExecutor:
+    # Runs submitted work immediately on the calling thread so timings exclude Tk scheduling
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    def submit(self, work, on_done=None, on_error=None, on_progress=None, key=None, write=False):
+        result = work(self.db_manager, InlineTask())
+        if on_done is not None:
+            on_done(result)
+
+def timed(func, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+def database_path(data_dir, size, seed):
+    path = os.path.join(data_dir, f"synthetic_{size}_{seed}.db")
+    if not os.path.exists(path):
+        print(f"generating {size} records into {path}")
+        build_database(path, size, seed)
+    return path
+
+def scratch_copy(path, data_dir):
+    # Write benchmarks run on a copy so the cached database stays at its generated size
+    copy = os.path.join(data_dir, "scratch.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(copy + suffix):
+            os.remove(copy + suffix)
+    source = sqlite3.connect(path)
+    target = sqlite3.connect(copy)
+    source.backup(target)
+    source.close()
+    target.close()
+    return copy
+
+def storage_benchmarks(db_manager):
+    records = list(generate_records(10_000, seed=99))
+    single = iter(records)
+    middle = db_manager.fetch_all("SELECT MAX(id) / 2 FROM records")[0][0] or 0
+    return [
+        ("insert_record x100", lambda: [db_manager.insert_record(next(single)) for _ in range(100)]),
+        ("insert_records 10k", lambda: db_manager.insert_records(records)),
+        ("update_record x100", lambda: [db_manager.update_record(records[0], id) for id in range(1, 101)]),
+        ("get_records_page first", lambda: db_manager.get_records_page(0, 200)),
+        ("get_records_page middle", lambda: db_manager.get_records_page(middle, 200)),
+        ("get_record x1000", lambda: [db_manager.get_record(id) for id in range(1, 1001)]),
+    ]
+
+def search_benchmarks(db_manager):
+    planner = SearchPlanner(db_manager)
+
+    def search(text, columns):
+        where, params = planner.plan(text)
+        if isinstance(where, ColumnFilter) and not columns:
+            where, params = where.sql, where.params
+        return db_manager.get_records_page(0, 200, where, params)
+
+    def load_columns():
+        return ColumnStore().sync(db_manager)
+
+    db_manager.column_store()
+    return ([(f"search {text!r}", lambda text=text: search(text, True)) for text in SEARCHES] +
+            [(f"search {text!r} (sql)", lambda text=text: search(text, False)) for text in SEARCHES] +
+            [("column store load", load_columns)])
+
+def analysis_benchmarks(db_manager):
+    def tables(build):
+        matrix = build(db_manager)
+        return [matrix.table_rows(my_paragon) for my_paragon in matrix.my_paragons()]
+
+    def mmr_chart():
+        series = load_mmr_series(db_manager)
+        return series.window(0, len(series), CHART_WIDTH)
+
+    def trends():
+        games = load_game_series(db_manager)
+        return games.rolling_games(50), games.by_mmr_band(100), games.by_week()
+
+    return [
+        ("analysis tables (matchup_stats)", lambda: tables(matchup_matrix)),
+        ("analysis tables (group by)", lambda: tables(matchup_matrix_sql)),
+        ("mmr chart preparation", mmr_chart),
+        ("trend statistics", trends),
+    ]
+
+def table_benchmarks(db_manager):
+    def populate():
+        table = RecordTable(ListTree(), NullScrollbar(), InlineExecutor(db_manager))
+        table.reset()
+        # Scroll to the bottom of the window five times, as a user paging through the history would
+        for _ in range(5):
+            table.on_scroll(0.5, 1.0)
+        return table
+
+    return [("treeview first page + 5 pages", populate)]
+
+def run(sizes, repeat, data_dir, seed):
+    os.makedirs(data_dir, exist_ok=True)
+    results = []
+    for size in sizes:
+        path = database_path(data_dir, size, seed)
+        db_manager = DatabaseManager(path)
+        groups = search_benchmarks(db_manager) + analysis_benchmarks(db_manager) + table_benchmarks(db_manager)
+        for name, func in groups:
+            runs = timed(func, repeat)
+            results.append(report(size, name, runs))
+        db_manager.close()
+
+        db_manager = DatabaseManager(scratch_copy(path, data_dir))
+        for name, func in storage_benchmarks(db_manager):
+            runs = timed(func, repeat)
+            results.append(report(size, name, runs))
+        db_manager.close()
+    return results
+
+def report(size, name, runs):
+    median = statistics.median(runs)
+    print(f"{size:>10}  {name:<36} {median * 1000:>10.2f}ms  (min {min(runs) * 1000:.2f}ms)")
+    return {"size": size, "name": name, "median": median, "min": min(runs), "runs": runs}
+
+def compare(results, previous_path):
+    with open(previous_path, encoding="utf-8") as file:
+        previous = {(entry["size"], entry["name"]): entry for entry in json.load(file)["results"]}
+    print(f"\nchange against {previous_path} (median, >1.0 is slower)")
+    for entry in results:
+        before = previous.get((entry["size"], entry["name"]))
+        if before is not None and before["median"] > 0:
+            print(f"{entry['size']:>10}  {entry['name']:<36} {entry['median'] / before['median']:>6.2f}x")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=os.path.join("benchmarks", "data"))
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, args.data_dir, args.seed)
+    if args.output:
+        meta = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"meta": meta, "results": results}, file, indent=2)
+        print(f"results written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+# Synthetic match history for benchmarks. The player mains a few paragons, opponents follow a
+# skewed meta, results depend on the matchup, turn order and MMR, MMR is a random walk driven
+# by the results and games are spread over days at a varying pace.
+# Build a database file: python -m benchmarks.synthetic db/bench_1m.db 1000000 [--seed 0]
+import argparse
+import math
+import random
+import time
+from datetime import date, timedelta
+from db.db_manager import DatabaseManager, INSERT_COLUMNS
+from utils.validation import get_paragon_registry
+
+PARAGONS = list(get_paragon_registry())
+
+START_DATE = date(2024, 1, 1)
+START_MMR = 1500
+MMR_STEP = (8, 25)
+
+def zipf_weights(count, exponent):
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+def generate_records(count, seed=0):
+    # Yields (my_paragon, opp_paragon, turn_order, result, my_mmr, date) tuples; same seed, same rows
+    rng = random.Random(seed)
+    my_order = rng.sample(PARAGONS, len(PARAGONS))
+    opp_order = rng.sample(PARAGONS, len(PARAGONS))
+    my_weights = zipf_weights(len(PARAGONS), 1.6)
+    opp_weights = zipf_weights(len(PARAGONS), 0.8)
+    # Fixed per-matchup edge in win probability, antisymmetric like a real matchup chart
+    edge = {}
+    for my_paragon in PARAGONS:
+        for opp_paragon in PARAGONS:
+            if (opp_paragon, my_paragon) in edge:
+                edge[my_paragon, opp_paragon] = -edge[opp_paragon, my_paragon]
+            else:
+                edge[my_paragon, opp_paragon] = 0.0 if my_paragon == opp_paragon else rng.uniform(-0.12, 0.12)
+
+    day = START_DATE
+    games_today = 0
+    day_length = rng.randint(0, 40)
+    mmr = START_MMR
+    batch = 1024
+    while count > 0:
+        mine = rng.choices(my_order, my_weights, k=batch)
+        theirs = rng.choices(opp_order, opp_weights, k=batch)
+        for my_paragon, opp_paragon in zip(mine[:count], theirs[:count]):
+            while games_today >= day_length:
+                # Some days have no games at all
+                day += timedelta(days=1)
+                games_today = 0
+                day_length = rng.randint(0, 40)
+            turn_order = "OTP" if rng.random() < 0.5 else "OTD"
+            # Going first helps a little; climbing means stronger opponents
+            chance = 0.5 + edge[my_paragon, opp_paragon] + (0.03 if turn_order == "OTP" else -0.03)
+            chance -= math.tanh((mmr - START_MMR) / 800) * 0.1
+            won = rng.random() < chance
+            mmr = max(mmr + rng.randint(*MMR_STEP) * (1 if won else -1), 0)
+            yield (my_paragon, opp_paragon, turn_order, "WIN" if won else "LOSE", mmr, day.strftime("%d/%m/%Y"))
+            games_today += 1
+        count -= batch
+
+def populate(db_manager, count, seed=0):
+    with db_manager.transaction() as cursor:
+        cursor.executemany(
+            f"INSERT INTO records ({INSERT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (db_manager.encode_record(record) for record in generate_records(count, seed)))
+
+def build_database(path, count, seed=0, chunk_size=50000, progress=None):
+    # File database through the bulk import path: triggers suspended, summaries caught up at the end
+    db_manager = DatabaseManager(path)
+    try:
+        with db_manager.bulk_load():
+            chunk = []
+            written = 0
+            for record in generate_records(count, seed):
+                chunk.append(record)
+                if len(chunk) == chunk_size:
+                    written += db_manager.insert_records(chunk)
+                    chunk = []
+                    if progress is not None:
+                        progress(written)
+            if chunk:
+                written += db_manager.insert_records(chunk)
+    finally:
+        db_manager.close()
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic match history database")
+    parser.add_argument("path")
+    parser.add_argument("count", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    count = build_database(args.path, args.count, args.seed, progress=lambda written: print(f"{written}...", end="\r"))
+    print(f"{count} records written to {args.path} in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
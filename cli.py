@@ -0,0 +1,143 @@
+import argparse
+import sys
+import time
+from db.db_manager import DatabaseManager
+from db.importer import import_file, write_rejects
+from db.exporter import export_records, export_matchups, export_matrix
+from db.profiles import ProfileStore
+from analytics.matchups import matchup_matrix_profiles
+from utils.config import load_config
+
+def stats_command(args):
+    db_manager = DatabaseManager(args.db)
+    try:
+        if args.action == "rebuild":
+            db_manager.rebuild_matchup_stats()
+            print("matchup_stats rebuilt")
+            return 0
+
+        mismatches = db_manager.check_matchup_stats()
+        for source, my_paragon, opp_paragon, turn_order, matches, wins in mismatches:
+            print(f"{source}: {my_paragon} vs {opp_paragon} ({turn_order}) matches={matches} wins={wins}")
+        if mismatches:
+            print("matchup_stats is inconsistent, run 'stats rebuild' to repair it")
+            return 1
+        print("matchup_stats is consistent")
+        return 0
+    finally:
+        db_manager.close()
+
+def import_command(args):
+    db_manager = DatabaseManager(args.db)
+    try:
+        start = time.perf_counter()
+        report = import_file(db_manager, args.path, args.format, args.chunk_size,
+                             progress=lambda report: print(f"{report.inserted} imported...", end="\r"))
+        print(f"{report.summary()} in {time.perf_counter() - start:.1f}s")
+        for line, reason in report.rejected[:20]:
+            print(f"line {line}: {reason}")
+        if len(report.rejected) > 20:
+            print(f"... and {len(report.rejected) - 20} more")
+        if args.rejects and report.rejected:
+            write_rejects(report, args.rejects)
+            print(f"Rejected rows written to {args.rejects}")
+        return 0
+    finally:
+        db_manager.close()
+
+def export_command(args):
+    db_manager = DatabaseManager(args.db)
+    try:
+        start = time.perf_counter()
+        if args.table == "records":
+            count = export_records(db_manager, args.path, args.format, args.batch_size)
+        else:
+            count = export_matchups(db_manager, args.path, args.format)
+        print(f"{count} rows written to {args.path} in {time.perf_counter() - start:.1f}s")
+        return 0
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        db_manager.close()
+
+def report_command(args):
+    # numpy and matplotlib are only loaded for this command
+    from analytics.report import generate_reports
+
+    db_paths = args.databases or [args.db or load_config()["db_path"]]
+    failed = 0
+    for db_path, path, error, elapsed in generate_reports(db_paths, args.output, args.workers, not args.no_charts):
+        if error is not None:
+            failed += 1
+            print(f"{db_path}: {error}", file=sys.stderr)
+        else:
+            print(f"{db_path}: {path} in {elapsed:.1f}s")
+    return 1 if failed else 0
+
+def profiles_command(args):
+    store = ProfileStore(args.profiles_dir or load_config()["profiles_dir"])
+    names = args.names or store.names()
+    if args.action == "list":
+        for name in names:
+            print(name)
+        return 0
+
+    if not args.path:
+        print("combine needs an output path", file=sys.stderr)
+        return 1
+    try:
+        start = time.perf_counter()
+        count = export_matrix(matchup_matrix_profiles(store.paths(names)), args.path, args.format)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"{count} matchups over {len(names)} profiles written to {args.path} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli", description="Parallel Self Tracker command line tools")
+    parser.add_argument("--db", help="database file (defaults to config.json, PST_DB_PATH or db/data_system.db)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    stats_parser = subparsers.add_parser("stats", help="Verify or rebuild the matchup summary table")
+    stats_parser.add_argument("action", choices=["check", "rebuild"])
+    stats_parser.set_defaults(func=stats_command)
+
+    import_parser = subparsers.add_parser("import", help="Bulk import match history from CSV or JSONL")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=["csv", "jsonl"], help="defaults to the file extension")
+    import_parser.add_argument("--chunk-size", type=int, default=10000)
+    import_parser.add_argument("--rejects", help="write rejected rows and reasons to this CSV file")
+    import_parser.set_defaults(func=import_command)
+
+    export_parser = subparsers.add_parser("export", help="Export records or the matchup matrix")
+    export_parser.add_argument("table", choices=["records", "matchups"])
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=["csv", "jsonl", "parquet"], help="defaults to the file extension")
+    export_parser.add_argument("--batch-size", type=int, default=10000)
+    export_parser.set_defaults(func=export_command)
+
+    profiles_parser = subparsers.add_parser("profiles", help="List profiles or combine their matchup matrices")
+    profiles_parser.add_argument("action", choices=["list", "combine"])
+    profiles_parser.add_argument("path", nargs="?", help="output file for combine")
+    profiles_parser.add_argument("--names", nargs="+", help="profiles to include (defaults to all)")
+    profiles_parser.add_argument("--profiles-dir", help="defaults to profiles_dir from config.json")
+    profiles_parser.add_argument("--format", choices=["csv", "jsonl", "parquet"], help="defaults to the file extension")
+    profiles_parser.set_defaults(func=profiles_command)
+
+    report_parser = subparsers.add_parser("report", help="Render matchup tables and the MMR chart to HTML/PNG")
+    report_parser.add_argument("databases", nargs="*", help="database files, one report each (defaults to --db)")
+    report_parser.add_argument("--output", default="report", help="output directory")
+    report_parser.add_argument("--workers", type=int, help="processes used for several databases")
+    report_parser.add_argument("--no-charts", action="store_true", help="skip the PNG chart (no matplotlib needed)")
+    report_parser.set_defaults(func=report_command)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
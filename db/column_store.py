@@ -0,0 +1,252 @@
+import threading
+import numpy as np
+from db.schema import TURN_ORDER_CODES, RESULT_CODES
+
+# Stored for a missing MMR or unparseable date; query bounds never reach it
+NULL_VALUE = -2**31
+
+# Small code sets, each code with its own bitmap
+CATEGORICAL = (("my_paragon", np.int16), ("opp_paragon", np.int16), ("turn_order", np.int8), ("result", np.int8))
+NUMERIC = (("my_mmr", np.int32), ("day", np.int32))
+COLUMNS = CATEGORICAL + NUMERIC
+
+# Same column order as COLUMNS after the id; day counts from 1970-01-01 like analytics.trends
+SELECT_COLUMNS = f'''
+    id, my_paragon_id, opp_paragon_id, IFNULL(turn_order_code, -1), IFNULL(result_code, -1),
+    IFNULL(my_mmr, {NULL_VALUE}), IFNULL(CAST(julianday(date_iso) - 2440587.5 AS INTEGER), {NULL_VALUE})
+'''
+
+# Bitmap bytes unpacked per step while paging (8 rows per byte): small first, for dense filters
+FIRST_BLOCK_BYTES = 64
+MAX_BLOCK_BYTES = 8192
+MAX_MASKS = 8
+MAX_IN_PARAMS = 500
+
+def packed_length(rows):
+    return -(-rows // 8)
+
+def grow(array, length):
+    grown = np.zeros(length, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+class ColumnStore:
+    # Every record as numpy columns in id order. Each categorical code has a bitmap with one
+    # bit per row, packed 8 rows to a byte, so "my=Arak opp=Jahn turn=OTD" is two byte-wise ANDs.
+    # Deleted rows stay in place with their bits cleared. sync() catches up with the database
+    # through the change journal (edits, deletes, undo) and ids above the last one loaded (imports).
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.size = 0
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.columns = {name: np.zeros(0, dtype=dtype) for name, dtype in COLUMNS}
+        self.live = np.zeros(0, dtype=bool)
+        self.alive = np.zeros(0, dtype=np.uint8)
+        self.bitmaps = {name: {} for name, dtype in CATEGORICAL}
+        self.codes = {"turn_order": dict(TURN_ORDER_CODES), "result": dict(RESULT_CODES)}
+        self.version = None
+        self.journal_id = 0
+        self.max_id = 0
+        self.masks = {}
+
+    def __len__(self):
+        return int(np.count_nonzero(self.live[:self.size]))
+
+    def sync(self, db_manager, batch_size=50000):
+        with self.lock, db_manager.snapshot() as cursor:
+            cursor.execute("SELECT value FROM meta WHERE key = 'data_version'")
+            version = cursor.fetchone()[0]
+            if version == self.version:
+                return False
+
+            cursor.execute("SELECT name, id FROM paragons")
+            paragon_ids = dict(cursor.fetchall())
+            self.codes["my_paragon"] = self.codes["opp_paragon"] = paragon_ids
+
+            # Journaled changes to rows already loaded; a first load starts after the journal
+            cursor.execute("SELECT id, record_id FROM change_journal WHERE id > ? ORDER BY id", (self.journal_id,))
+            touched = set()
+            for journal_id, record_id in cursor.fetchall():
+                self.journal_id = journal_id
+                if record_id <= self.max_id:
+                    touched.add(record_id)
+            if self.version is None:
+                touched.clear()
+
+            if touched:
+                self.patch(cursor, sorted(touched))
+
+            cursor.execute(f"SELECT {SELECT_COLUMNS} FROM records WHERE id > ? ORDER BY id", (self.max_id,))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                self.append(np.array(rows, dtype=np.int64))
+
+            self.version = version
+            self.masks.clear()
+            return True
+
+    def reserve(self, size):
+        if size <= len(self.ids):
+            return
+        capacity = max(size, len(self.ids) * 2, 1024)
+        self.ids = grow(self.ids, capacity)
+        self.columns = {name: grow(column, capacity) for name, column in self.columns.items()}
+        self.live = grow(self.live, capacity)
+        self.alive = grow(self.alive, packed_length(capacity))
+        for bitmaps in self.bitmaps.values():
+            for code, bitmap in bitmaps.items():
+                bitmaps[code] = grow(bitmap, packed_length(capacity))
+
+    def append(self, rows):
+        start = self.size
+        end = start + len(rows)
+        self.reserve(end)
+        self.ids[start:end] = rows[:, 0]
+        for index, (name, dtype) in enumerate(COLUMNS, 1):
+            self.columns[name][start:end] = rows[:, index]
+        self.live[start:end] = True
+        self.size = end
+        self.max_id = int(self.ids[end - 1])
+        self.repack(start, end)
+
+    def patch(self, cursor, ids):
+        # Re-read rows changed since the last sync; missing rows are deletions
+        current = {}
+        for start in range(0, len(ids), MAX_IN_PARAMS):
+            chunk = ids[start:start + MAX_IN_PARAMS]
+            cursor.execute(f"SELECT {SELECT_COLUMNS} FROM records WHERE id IN ({', '.join('?' * len(chunk))})",
+                           chunk)
+            current.update((row[0], row) for row in cursor.fetchall())
+
+        restored = []
+        for id in ids:
+            position = int(np.searchsorted(self.ids[:self.size], id))
+            row = current.get(id)
+            if position < self.size and self.ids[position] == id:
+                if row is not None:
+                    for index, (name, dtype) in enumerate(COLUMNS, 1):
+                        self.columns[name][position] = row[index]
+                self.live[position] = row is not None
+                self.repack(position, position + 1)
+            elif row is not None:
+                # Undo of a delete that happened before the first load: the id has no slot yet
+                restored.append(row)
+        if restored:
+            self.insert(np.array(restored, dtype=np.int64))
+
+    def insert(self, rows):
+        # Rows with ids inside the loaded range; rare, so the arrays are rebuilt around them
+        positions = np.searchsorted(self.ids[:self.size], rows[:, 0])
+        size = self.size + len(rows)
+        ids = np.insert(self.ids[:self.size], positions, rows[:, 0])
+        columns = {name: np.insert(self.columns[name][:self.size], positions, rows[:, index])
+                   for index, (name, dtype) in enumerate(COLUMNS, 1)}
+        live = np.insert(self.live[:self.size], positions, True)
+        self.size = 0
+        self.reserve(size)
+        self.ids[:size] = ids
+        for name, column in columns.items():
+            self.columns[name][:size] = column
+        self.live[:size] = live
+        self.size = size
+        self.repack(0, size)
+
+    def repack(self, start, stop):
+        # Re-derive the bitmap bytes covering rows [start, stop) from the columns
+        low = start // 8 * 8
+        high = min(self.size, packed_length(stop) * 8)
+        live = self.live[low:high]
+        first = low // 8
+        last = first + packed_length(high - low)
+        self.alive[first:last] = np.packbits(live)
+        for name, dtype in CATEGORICAL:
+            column = self.columns[name][low:high]
+            bitmaps = self.bitmaps[name]
+            for code in np.unique(column[live]):
+                # A code seen for the first time has no bits set outside this range
+                if code not in bitmaps:
+                    bitmaps[code] = np.zeros(len(self.alive), dtype=np.uint8)
+            for code, bitmap in bitmaps.items():
+                bitmap[first:last] = np.packbits((column == code) & live)
+
+    def mask(self, column_filter):
+        # Packed bitmap of the live rows matching a db.search.ColumnFilter
+        key = column_filter.key()
+        mask = self.masks.get(key)
+        if mask is not None:
+            return mask
+        length = packed_length(self.size)
+        mask = self.alive[:length].copy()
+        for name, values in column_filter.values.items():
+            codes = self.codes.get(name, {})
+            union = np.zeros(length, dtype=np.uint8)
+            for value in values:
+                bitmap = self.bitmaps[name].get(codes.get(value))
+                if bitmap is not None:
+                    union |= bitmap[:length]
+            mask &= union
+        for name, (low, high) in column_filter.ranges.items():
+            column = self.columns[name][:self.size]
+            mask &= np.packbits((column >= low) & (column <= high))
+
+        if len(self.masks) >= MAX_MASKS:
+            self.masks.pop(next(iter(self.masks)))
+        self.masks[key] = mask
+        return mask
+
+    def count(self, column_filter):
+        with self.lock:
+            return int(np.unpackbits(self.mask(column_filter)).sum())
+
+    def search(self, column_filter, after_id=0, limit=200, before_id=None):
+        # Ids of one keyset page, ascending, like DatabaseManager.get_records_page
+        with self.lock:
+            mask = self.mask(column_filter)
+            ids = self.ids[:self.size]
+            if before_id is None:
+                positions = self.scan_forward(mask, int(np.searchsorted(ids, after_id, side="right")), limit)
+            else:
+                positions = self.scan_backward(mask, int(np.searchsorted(ids, before_id, side="left")), limit)
+            return ids[positions].tolist()
+
+    def scan_forward(self, mask, start, limit):
+        # Unpack only as many bitmap blocks as it takes to fill the page
+        found = []
+        total = 0
+        byte = start // 8
+        block = FIRST_BLOCK_BYTES
+        while byte < len(mask) and total < limit:
+            positions = np.flatnonzero(np.unpackbits(mask[byte:byte + block])) + byte * 8
+            positions = positions[positions >= start][:limit - total]
+            found.append(positions)
+            total += len(positions)
+            byte += block
+            block = min(block * 2, MAX_BLOCK_BYTES)
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+    def scan_backward(self, mask, stop, limit):
+        found = []
+        total = 0
+        byte = packed_length(stop)
+        block = FIRST_BLOCK_BYTES
+        while byte > 0 and total < limit:
+            first = max(byte - block, 0)
+            positions = np.flatnonzero(np.unpackbits(mask[first:byte])) + first * 8
+            positions = positions[positions < stop]
+            positions = positions[max(len(positions) - (limit - total), 0):]
+            found.insert(0, positions)
+            total += len(positions)
+            byte = first
+            block = min(block * 2, MAX_BLOCK_BYTES)
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+    def games(self):
+        # Live rows with a valid date as {column: array} in date order, ties by id
+        with self.lock:
+            keep = self.live[:self.size] & (self.columns["day"][:self.size] != NULL_VALUE)
+            ids = self.ids[:self.size][keep]
+            columns = {name: column[:self.size][keep] for name, column in self.columns.items()}
+            order = np.lexsort((ids, columns["day"]))
+            return {name: column[order] for name, column in columns.items()}
@@ -1,53 +1,410 @@
+import json
+import os
 import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+from db.migrations import migrate
+from db.schema import RECORD_COLUMNS, TURN_ORDER_CODES, RESULT_CODES, REBUILD_MATCHUP_STATS, to_iso_date
+from db.search import ColumnFilter
+from utils.config import load_config
+from utils.profiling import timed_query, instrument_connection
+
+INSERT_COLUMNS = ("my_paragon, opp_paragon, turn_order, result, my_mmr, date, "
+                  "date_iso, my_paragon_id, opp_paragon_id, turn_order_code, result_code")
+
+# SQLite's default limit on bound parameters is 999; stay well below it for IN (...) lists
+MAX_IN_PARAMS = 500
 
 class DatabaseManager:
-    def __init__(self):
-        self.conn = sqlite3.connect('db/data_system.db')
+    # One writer connection shared behind a lock and one read-only connection per thread.
+    # In WAL mode readers never block the writer, so worker threads can query while it commits.
+    def __init__(self, db_path=None, config=None):
+        self.config = config or load_config()
+        self.db_path = db_path or self.config["db_path"]
+        self.in_memory = self.db_path == ":memory:"
+
+        self.write_lock = threading.RLock()
+        self.depth = 0
+        # Journal batch of the open transaction, assigned by its first journaled change
+        self.batch = None
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                    timeout=self.config["busy_timeout_ms"] / 1000)
+        self.configure(self.conn)
+
+        self.local = threading.local()
+        self.readers = []
+        self.readers_lock = threading.Lock()
+        # In-memory columns of the records (db.column_store), loaded on first use
+        self.columns = None
+        self.columns_lock = threading.Lock()
         self.create_table()
 
+    def configure(self, conn):
+        if not self.in_memory:
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.config['synchronous']}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.config['cache_size_kib'])}")
+        conn.execute(f"PRAGMA mmap_size={int(self.config['mmap_size'])}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        instrument_connection(conn)
+
+    def reader(self):
+        # Read connection owned by the calling thread, opened on first use
+        if self.in_memory:
+            # A private in-memory database cannot be shared, so reads use the writer
+            return self.conn
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            uri = "file:" + quote(os.path.abspath(self.db_path)) + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                   timeout=self.config["busy_timeout_ms"] / 1000)
+            self.configure(conn)
+            self.local.conn = conn
+            with self.readers_lock:
+                self.readers.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        # Unit of work: nested transactions join the outermost one, which commits once
+        with self.write_lock:
+            self.depth += 1
+            try:
+                yield self.conn.cursor()
+            except BaseException:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.batch = None
+                    self.conn.rollback()
+                    self.load_paragon_ids()
+                raise
+            self.depth -= 1
+            if self.depth == 0:
+                self.batch = None
+                self.bump_data_version()
+                self.conn.commit()
+
+    @contextmanager
+    def snapshot(self):
+        # Cursor whose queries all see the same committed state
+        if self.in_memory:
+            with self.write_lock:
+                yield self.conn.cursor()
+            return
+        conn = self.reader()
+        conn.execute("BEGIN")
+        try:
+            yield conn.cursor()
+        finally:
+            conn.commit()
+
+    def column_store(self):
+        # The column store caught up with the latest commit, or None when disabled in the config.
+        # numpy is only imported here so startup does not pay for it.
+        if not self.config["column_store"]:
+            return None
+        with self.columns_lock:
+            if self.columns is None:
+                from db.column_store import ColumnStore
+                self.columns = ColumnStore()
+        self.columns.sync(self)
+        return self.columns
+
+    def bump_data_version(self):
+        self.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'data_version'")
+
+    @timed_query("db.get_data_version")
+    def get_data_version(self):
+        return self.fetch_all("SELECT value FROM meta WHERE key = 'data_version'")[0][0]
+
     def create_table(self):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS records (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                my_paragon TEXT NOT NULL,
-                opp_paragon TEXT NOT NULL,
-                turn_order TEXT NOT NULL,
-                result TEXT NOT NULL,
-                my_mmr INT NOT NULL,
-                date TEXT NOT NULL
+        migrate(self.conn)
+        self.load_paragon_ids()
+        self.database_id = self.fetch_all("SELECT value FROM meta WHERE key = 'database_id'")[0][0]
+        self.full_text = bool(self.fetch_all("SELECT 1 FROM sqlite_master WHERE name='records_fts'"))
+
+    def has_full_text_index(self):
+        return self.full_text
+
+    def load_paragon_ids(self):
+        # Ids cached by paragon_id() inside a transaction that rolled back were never stored
+        self.paragon_ids = dict(self.conn.execute("SELECT name, id FROM paragons").fetchall())
+
+    def paragon_id(self, name):
+        if name not in self.paragon_ids:
+            with self.transaction() as cursor:
+                cursor.execute("INSERT OR IGNORE INTO paragons (name) VALUES (?)", (name,))
+                cursor.execute("SELECT id FROM paragons WHERE name=?", (name,))
+                self.paragon_ids[name] = cursor.fetchone()[0]
+        return self.paragon_ids[name]
+
+    @timed_query("db.get_paragon_names")
+    def get_paragon_names(self):
+        # Read from the table rather than the per-connection cache, which misses other writers
+        return [name for (name,) in self.fetch_all("SELECT name FROM paragons ORDER BY name")]
+
+    def encode_record(self, record):
+        # The user-facing columns followed by their typed copies, in INSERT_COLUMNS order
+        my_paragon, opp_paragon, turn_order, result, my_mmr, date = record
+        return (my_paragon, opp_paragon, turn_order, result, my_mmr, date,
+                to_iso_date(date), self.paragon_id(my_paragon), self.paragon_id(opp_paragon),
+                TURN_ORDER_CODES.get(turn_order), RESULT_CODES.get(result))
+
+    @timed_query("db.rebuild_matchup_stats")
+    def rebuild_matchup_stats(self):
+        with self.transaction() as cursor:
+            cursor.execute("DELETE FROM matchup_stats")
+            cursor.execute(REBUILD_MATCHUP_STATS)
+
+    @timed_query("db.check_matchup_stats")
+    def check_matchup_stats(self):
+        # Rows of the summary that disagree with an aggregate of the raw records;
+        # each entry is (source, my_paragon, opp_paragon, turn_order, matches, wins)
+        return self.fetch_all('''
+            SELECT 'records', * FROM (
+                SELECT my_paragon, opp_paragon, turn_order, COUNT(*), SUM(result = 'WIN')
+                FROM records GROUP BY my_paragon, opp_paragon, turn_order
+                EXCEPT SELECT * FROM matchup_stats
+            )
+            UNION ALL
+            SELECT 'matchup_stats', * FROM (
+                SELECT * FROM matchup_stats
+                EXCEPT SELECT my_paragon, opp_paragon, turn_order, COUNT(*), SUM(result = 'WIN')
+                FROM records GROUP BY my_paragon, opp_paragon, turn_order
             )
         ''')
-        self.conn.commit()
 
+    @timed_query("db.get_mmr_history")
+    def get_mmr_history(self):
+        # (date, my_mmr) in chronological order, served by the date_iso index
+        return self.fetch_all("SELECT date, my_mmr FROM records ORDER BY date_iso, id")
+
+    @timed_query("db.get_matchup_stats")
+    def get_matchup_stats(self):
+        return self.fetch_all("SELECT * FROM matchup_stats ORDER BY my_paragon, opp_paragon, turn_order")
+
+    @timed_query("db.get_all_records")
     def get_all_records(self):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM records ORDER BY id")
+        cursor = self.reader().cursor()
+        cursor.execute(f"SELECT {RECORD_COLUMNS} FROM records ORDER BY id")
         records = cursor.fetchall()
         
         return records
 
+    @timed_query("db.has_records")
+    def has_records(self):
+        return self.fetch_all("SELECT EXISTS (SELECT 1 FROM records)")[0][0] == 1
+
+    @timed_query("db.get_records_page")
+    def get_records_page(self, after_id=0, limit=200, where=None, params=(), before_id=None):
+        # Keyset pagination by id: never OFFSET, so every page is an index range scan
+        if isinstance(where, ColumnFilter):
+            store = self.column_store()
+            if store is not None:
+                ids = store.search(where, after_id, limit, before_id)
+                records = self.get_records(ids)
+                return [records[id] for id in ids if id in records]
+            where, params = where.sql, where.params
+        if before_id is not None:
+            query = f"SELECT {RECORD_COLUMNS} FROM records WHERE id < ?"
+            args = (before_id,)
+        else:
+            query = f"SELECT {RECORD_COLUMNS} FROM records WHERE id > ?"
+            args = (after_id,)
+        if where:
+            query += f" AND ({where})"
+        query += " ORDER BY id DESC LIMIT ?" if before_id is not None else " ORDER BY id LIMIT ?"
+        records = self.fetch_all(query, args + tuple(params) + (limit,))
+        if before_id is not None:
+            records.reverse()
+        return records
+
+    @timed_query("db.get_record")
+    def get_record(self, id, where=None, params=()):
+        if isinstance(where, ColumnFilter):
+            where, params = where.sql, where.params
+        query = f"SELECT {RECORD_COLUMNS} FROM records WHERE id=?"
+        if where:
+            query += f" AND ({where})"
+        records = self.fetch_all(query, (id,) + tuple(params))
+        return records[0] if records else None
+
+    @timed_query("db.get_records")
+    def get_records(self, ids, where=None, params=()):
+        # {id: record} for the ids that exist and match the filter
+        if isinstance(where, ColumnFilter):
+            where, params = where.sql, where.params
+        ids = list(ids)
+        records = {}
+        for start in range(0, len(ids), MAX_IN_PARAMS):
+            chunk = ids[start:start + MAX_IN_PARAMS]
+            query = f"SELECT {RECORD_COLUMNS} FROM records WHERE id IN ({', '.join('?' * len(chunk))})"
+            if where:
+                query += f" AND ({where})"
+            for record in self.fetch_all(query, tuple(chunk) + tuple(params)):
+                records[record[0]] = record
+        return records
+
+    @timed_query("db.fetch_all")
     def fetch_all(self, query, params=()):
-        cursor = self.conn.cursor()
+        cursor = self.reader().cursor()
         cursor.execute(query, params)
         records = cursor.fetchall()
         return records
     
+    @timed_query("db.insert_record")
     def insert_record(self, record):
-        cursor = self.conn.cursor()
-        cursor.execute("INSERT INTO records (my_paragon, opp_paragon, turn_order, result, my_mmr, date) VALUES (?, ?, ?, ?, ?, ?)", record)
-        self.conn.commit()
+        with self.transaction() as cursor:
+            return self.write_insert(cursor, record)
     
+    @contextmanager
+    def bulk_load(self):
+        # One transaction with the per-row triggers on records suspended; matchup_stats and
+        # records_fts are brought up to date with set-based statements before committing
+        with self.write_lock:
+            if self.depth:
+                raise RuntimeError("bulk_load cannot run inside another transaction")
+            self.conn.commit()
+            cursor = self.conn.cursor()
+            cursor.execute("BEGIN")
+            self.depth += 1
+            try:
+                start_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM records").fetchone()[0]
+                triggers = cursor.execute(
+                    "SELECT name, sql FROM sqlite_master WHERE type='trigger' AND tbl_name='records'").fetchall()
+                for name, sql in triggers:
+                    cursor.execute(f"DROP TRIGGER {name}")
+
+                yield
+
+                cursor.execute('''
+                    INSERT INTO matchup_stats (my_paragon, opp_paragon, turn_order, matches, wins)
+                    SELECT my_paragon, opp_paragon, turn_order, COUNT(*), SUM(result = 'WIN')
+                    FROM records WHERE id > ? GROUP BY my_paragon, opp_paragon, turn_order
+                    ON CONFLICT (my_paragon, opp_paragon, turn_order)
+                    DO UPDATE SET matches = matches + excluded.matches, wins = wins + excluded.wins
+                ''', (start_id,))
+                if self.full_text:
+                    cursor.execute('''
+                        INSERT INTO records_fts (rowid, my_paragon, opp_paragon, turn_order, result, my_mmr, date)
+                        SELECT id, my_paragon, opp_paragon, turn_order, result, my_mmr, date FROM records WHERE id > ?
+                    ''', (start_id,))
+                for name, sql in triggers:
+                    cursor.execute(sql)
+                self.bump_data_version()
+            except BaseException:
+                # Rolling back also restores the dropped triggers
+                self.conn.rollback()
+                self.load_paragon_ids()
+                raise
+            finally:
+                self.depth -= 1
+            self.conn.commit()
+
+    @timed_query("db.insert_records")
+    def insert_records(self, records):
+        # Bulk insert through executemany; commits unless called inside transaction() or bulk_load()
+        with self.transaction() as cursor:
+            cursor.executemany(f"INSERT INTO records ({INSERT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               [self.encode_record(record) for record in records])
+        return cursor.rowcount
+    
+    @timed_query("db.update_record")
     def update_record(self, record, id):
-        cursor = self.conn.cursor()
-        cursor.execute("UPDATE records SET my_paragon=?, opp_paragon=?, turn_order=?, result=?, my_mmr=?, date=? WHERE id=?", record + (id,))
-        self.conn.commit()
+        with self.transaction() as cursor:
+            self.write_update(cursor, record, id)
     
+    @timed_query("db.delete_record")
     def delete_record(self, ids):
-        cursor = self.conn.cursor()
-        for id in ids:
-            cursor.execute("DELETE FROM records WHERE id=?", (id,))
-        self.conn.commit()
+        with self.transaction() as cursor:
+            self.write_delete(cursor, ids)
+
+    # Journaled single-record writes: callers hold a transaction and pass its cursor.
+    # Bulk imports (insert_records, bulk_load) are not journaled.
+    def write_insert(self, cursor, record, id=None):
+        if id is None:
+            cursor.execute(f"INSERT INTO records ({INSERT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                           self.encode_record(record))
+            id = cursor.lastrowid
+        else:
+            # Restoring a deleted record under its original id
+            cursor.execute(f"INSERT INTO records (id, {INSERT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                           (id,) + self.encode_record(record))
+        self.journal(cursor, [(id, "insert", None, record)])
+        return id
+
+    def write_update(self, cursor, record, id):
+        before = self.current_records(cursor, [id]).get(id)
+        if before is None:
+            return
+        cursor.execute("UPDATE records SET my_paragon=?, opp_paragon=?, turn_order=?, result=?, my_mmr=?, date=?, "
+                       "date_iso=?, my_paragon_id=?, opp_paragon_id=?, turn_order_code=?, result_code=? WHERE id=?",
+                       self.encode_record(record) + (id,))
+        self.journal(cursor, [(id, "update", before, record)])
+
+    def write_delete(self, cursor, ids):
+        # Set-based delete, chunked to stay under SQLite's bound parameter limit
+        before = self.current_records(cursor, ids)
+        ids = list(before)
+        for start in range(0, len(ids), MAX_IN_PARAMS):
+            chunk = ids[start:start + MAX_IN_PARAMS]
+            cursor.execute(f"DELETE FROM records WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+        self.journal(cursor, [(id, "delete", before[id], None) for id in ids])
+        return ids
+
+    def current_records(self, cursor, ids):
+        # {id: six-field record} read through the writer so uncommitted changes are visible
+        ids = list(ids)
+        records = {}
+        for start in range(0, len(ids), MAX_IN_PARAMS):
+            chunk = ids[start:start + MAX_IN_PARAMS]
+            cursor.execute(f"SELECT {RECORD_COLUMNS} FROM records WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+            for row in cursor.fetchall():
+                records[row[0]] = row[1:]
+        return records
+
+    def journal(self, cursor, entries):
+        # entries: (record_id, op, before, after) with before/after as six-field records or None
+        if not entries:
+            return
+        if self.batch is None:
+            self.batch = cursor.execute("SELECT COALESCE(MAX(batch), 0) + 1 FROM change_journal").fetchone()[0]
+        cursor.executemany(
+            "INSERT INTO change_journal (batch, record_id, op, before, after) VALUES (?, ?, ?, ?, ?)",
+            [(self.batch, id, op, None if before is None else json.dumps(list(before)),
+              None if after is None else json.dumps(list(after))) for id, op, before, after in entries])
+
+    def current_batch(self):
+        # Journal batch written so far by the open transaction, None if it changed nothing
+        return self.batch
+
+    @timed_query("db.revert_batch")
+    def revert_batch(self, batch):
+        # Applies the inverse of every change in batch, newest first, as a new journaled batch.
+        # Reverting that new batch redoes the original. Returns (new batch, [(op, record_id)]).
+        changes = []
+        with self.transaction() as cursor:
+            entries = cursor.execute("SELECT record_id, op, before, after FROM change_journal "
+                                     "WHERE batch=? ORDER BY id DESC", (batch,)).fetchall()
+            for id, op, before, after in entries:
+                if op == "insert":
+                    self.write_delete(cursor, [id])
+                    changes.append(("delete", id))
+                elif op == "update":
+                    self.write_update(cursor, json.loads(before), id)
+                    changes.append(("update", id))
+                else:
+                    self.write_insert(cursor, json.loads(before), id)
+                    changes.append(("insert", id))
+            new_batch = self.batch
+        return new_batch, changes
 
     def close(self):
-        self.conn.close()
\ No newline at end of file
+        with self.readers_lock:
+            for conn in self.readers:
+                conn.close()
+            self.readers = []
+        # Waits for a write still running on another thread (e.g. the ingestion server)
+        with self.write_lock:
+            self.conn.close()
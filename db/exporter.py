@@ -0,0 +1,95 @@
+import csv
+import json
+import os
+from db.schema import RECORD_COLUMNS
+from analytics.matchups import matchup_matrix, winrate, MATCHUP_COLUMNS
+
+EXPORT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+
+RECORD_FIELDS = tuple(column.strip() for column in RECORD_COLUMNS.split(","))
+MATCHUP_FIELDS = MATCHUP_COLUMNS + ("total_winrate", "otp_winrate", "otd_winrate")
+
+def detect_format(path):
+    file_format = EXPORT_FORMATS.get(os.path.splitext(path)[1].lower())
+    if file_format is None:
+        raise ValueError(f"Cannot infer the export format of '{path}', use .csv, .jsonl or .parquet")
+    return file_format
+
+def iter_record_batches(db_manager, batch_size=10000):
+    # Server-side cursor: only one batch of rows is held in memory at a time
+    cursor = db_manager.reader().cursor()
+    cursor.execute(f"SELECT {RECORD_COLUMNS} FROM records ORDER BY id")
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            break
+        yield batch
+
+def matchup_batches(matrix):
+    rows = []
+    for my_paragon, opp_paragon, otp_matches, otp_wins, otd_matches, otd_wins in matrix.rows():
+        rows.append((my_paragon, opp_paragon, otp_matches, otp_wins, otd_matches, otd_wins,
+                     round(winrate(otp_wins + otd_wins, otp_matches + otd_matches), 1),
+                     round(winrate(otp_wins, otp_matches), 1),
+                     round(winrate(otd_wins, otd_matches), 1)))
+    if rows:
+        yield rows
+
+def write_csv(path, fields, batches, progress):
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(fields)
+        for batch in batches:
+            writer.writerows(batch)
+            count += len(batch)
+            if progress is not None:
+                progress(count)
+    return count
+
+def write_jsonl(path, fields, batches, progress):
+    count = 0
+    with open(path, "w", encoding="utf-8") as file:
+        for batch in batches:
+            file.writelines(json.dumps(dict(zip(fields, row))) + "\n" for row in batch)
+            count += len(batch)
+            if progress is not None:
+                progress(count)
+    return count
+
+def write_parquet(path, fields, batches, progress):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet export requires the pyarrow package")
+
+    count = 0
+    writer = None
+    try:
+        for batch in batches:
+            columns = list(zip(*batch))
+            table = pa.table({field: list(column) for field, column in zip(fields, columns)})
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            count += len(batch)
+            if progress is not None:
+                progress(count)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "parquet": write_parquet}
+
+def export_records(db_manager, path, file_format=None, batch_size=10000, progress=None):
+    file_format = file_format or detect_format(path)
+    return WRITERS[file_format](path, RECORD_FIELDS, iter_record_batches(db_manager, batch_size), progress)
+
+def export_matchups(db_manager, path, file_format=None, progress=None):
+    return export_matrix(matchup_matrix(db_manager), path, file_format, progress)
+
+def export_matrix(matrix, path, file_format=None, progress=None):
+    file_format = file_format or detect_format(path)
+    return WRITERS[file_format](path, MATCHUP_FIELDS, matchup_batches(matrix), progress)
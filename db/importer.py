@@ -0,0 +1,100 @@
+import csv
+import json
+import os
+from itertools import islice
+from utils.validation import validate_records
+
+IMPORT_FIELDS = ("my_paragon", "opp_paragon", "turn_order", "result", "my_mmr", "date")
+
+class ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.rejected = []  # (line number, reason)
+
+    def reject(self, line, reason):
+        self.rejected.append((line, reason))
+
+    def summary(self):
+        return f"{self.inserted} records imported, {len(self.rejected)} rejected"
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension == ".csv":
+        return "csv"
+    raise ValueError(f"Cannot infer the import format of '{path}', pass csv or jsonl explicitly")
+
+def read_csv(file):
+    # Yields (line number, record tuple or error message); a header row names the columns
+    reader = csv.reader(file)
+    header = [name.strip() for name in next(reader, [])]
+    missing = [field for field in IMPORT_FIELDS if field not in header]
+    if missing:
+        raise ValueError(f"CSV header is missing columns: {', '.join(missing)}")
+    positions = [header.index(field) for field in IMPORT_FIELDS]
+    width = max(positions) + 1
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < width:
+            yield reader.line_num, f"expected {len(header)} columns, got {len(row)}"
+            continue
+        yield reader.line_num, tuple(row[position].strip() for position in positions)
+
+def read_jsonl(file):
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, f"invalid JSON: {e.msg}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, "expected a JSON object"
+            continue
+        yield line_number, tuple(str(row.get(field, "")).strip() for field in IMPORT_FIELDS)
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl}
+
+def import_file(db_manager, path, file_format=None, chunk_size=10000, progress=None):
+    file_format = file_format or detect_format(path)
+    report = ImportReport()
+
+    # Everything lands in one transaction on the WAL-mode writer connection
+    with open(path, newline="", encoding="utf-8") as file, db_manager.bulk_load():
+        rows = READERS[file_format](file)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            import_chunk(db_manager, chunk, report)
+            if progress is not None:
+                progress(report)
+    return report
+
+def import_chunk(db_manager, chunk, report):
+    lines = []
+    records = []
+    for line, record in chunk:
+        if isinstance(record, str):
+            report.reject(line, record)
+        else:
+            lines.append(line)
+            records.append(record)
+
+    invalid = set()
+    for index, reason in validate_records(records):
+        report.reject(lines[index], reason)
+        invalid.add(index)
+
+    valid = [record for index, record in enumerate(records) if index not in invalid]
+    if valid:
+        report.inserted += db_manager.insert_records(valid)
+
+def write_rejects(report, path):
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(("line", "reason"))
+        writer.writerows(sorted(report.rejected))
@@ -0,0 +1,207 @@
+import secrets
+import sqlite3
+from db.schema import REBUILD_MATCHUP_STATS, TURN_ORDER_CODES, RESULT_CODES, to_iso_date
+
+# Each migration moves the schema from version N-1 to N, tracked in PRAGMA user_version.
+# Append new migrations to MIGRATIONS; never edit one that has shipped.
+
+def create_records(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            my_paragon TEXT NOT NULL,
+            opp_paragon TEXT NOT NULL,
+            turn_order TEXT NOT NULL,
+            result TEXT NOT NULL,
+            my_mmr INT NOT NULL,
+            date TEXT NOT NULL
+        )
+    ''')
+
+def create_matchup_stats(conn):
+    # Summary of records per matchup, kept current by triggers so every writer stays consistent
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS matchup_stats (
+            my_paragon TEXT NOT NULL,
+            opp_paragon TEXT NOT NULL,
+            turn_order TEXT NOT NULL,
+            matches INT NOT NULL,
+            wins INT NOT NULL,
+            PRIMARY KEY (my_paragon, opp_paragon, turn_order)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS matchup_stats_insert AFTER INSERT ON records
+        BEGIN
+            INSERT INTO matchup_stats (my_paragon, opp_paragon, turn_order, matches, wins)
+            VALUES (NEW.my_paragon, NEW.opp_paragon, NEW.turn_order, 1, NEW.result = 'WIN')
+            ON CONFLICT (my_paragon, opp_paragon, turn_order)
+            DO UPDATE SET matches = matches + 1, wins = wins + excluded.wins;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS matchup_stats_delete AFTER DELETE ON records
+        BEGIN
+            UPDATE matchup_stats SET matches = matches - 1, wins = wins - (OLD.result = 'WIN')
+            WHERE my_paragon = OLD.my_paragon AND opp_paragon = OLD.opp_paragon AND turn_order = OLD.turn_order;
+            DELETE FROM matchup_stats
+            WHERE my_paragon = OLD.my_paragon AND opp_paragon = OLD.opp_paragon AND turn_order = OLD.turn_order
+            AND matches <= 0;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS matchup_stats_update
+        AFTER UPDATE OF my_paragon, opp_paragon, turn_order, result ON records
+        BEGIN
+            UPDATE matchup_stats SET matches = matches - 1, wins = wins - (OLD.result = 'WIN')
+            WHERE my_paragon = OLD.my_paragon AND opp_paragon = OLD.opp_paragon AND turn_order = OLD.turn_order;
+            DELETE FROM matchup_stats
+            WHERE my_paragon = OLD.my_paragon AND opp_paragon = OLD.opp_paragon AND turn_order = OLD.turn_order
+            AND matches <= 0;
+            INSERT INTO matchup_stats (my_paragon, opp_paragon, turn_order, matches, wins)
+            VALUES (NEW.my_paragon, NEW.opp_paragon, NEW.turn_order, 1, NEW.result = 'WIN')
+            ON CONFLICT (my_paragon, opp_paragon, turn_order)
+            DO UPDATE SET matches = matches + 1, wins = wins + excluded.wins;
+        END
+    ''')
+    conn.execute("DELETE FROM matchup_stats")
+    conn.execute(REBUILD_MATCHUP_STATS)
+
+def add_typed_columns(conn):
+    # Integer-coded copies of the categorical columns, an ISO date and the indexes that use them
+    conn.execute('''
+        CREATE TABLE paragons (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    conn.execute("ALTER TABLE records ADD COLUMN date_iso TEXT")
+    conn.execute("ALTER TABLE records ADD COLUMN my_paragon_id INTEGER REFERENCES paragons(id)")
+    conn.execute("ALTER TABLE records ADD COLUMN opp_paragon_id INTEGER REFERENCES paragons(id)")
+    conn.execute("ALTER TABLE records ADD COLUMN turn_order_code INTEGER")
+    conn.execute("ALTER TABLE records ADD COLUMN result_code INTEGER")
+
+    conn.execute('''
+        INSERT INTO paragons (name)
+        SELECT my_paragon FROM records UNION SELECT opp_paragon FROM records
+    ''')
+    paragon_ids = dict(conn.execute("SELECT name, id FROM paragons"))
+
+    cursor = conn.execute("SELECT id, my_paragon, opp_paragon, turn_order, result, date FROM records")
+    while True:
+        rows = cursor.fetchmany(10000)
+        if not rows:
+            break
+        conn.executemany('''
+            UPDATE records SET date_iso=?, my_paragon_id=?, opp_paragon_id=?, turn_order_code=?, result_code=?
+            WHERE id=?
+        ''', [
+            (to_iso_date(date), paragon_ids[my_paragon], paragon_ids[opp_paragon],
+             TURN_ORDER_CODES.get(turn_order), RESULT_CODES.get(result), id)
+            for id, my_paragon, opp_paragon, turn_order, result, date in rows
+        ])
+
+    conn.execute("CREATE INDEX idx_records_matchup ON records (my_paragon, opp_paragon)")
+    conn.execute("CREATE INDEX idx_records_date ON records (date_iso)")
+    conn.execute("CREATE INDEX idx_records_result ON records (result)")
+
+def add_search_index(conn):
+    # Indexes for single-field lookups plus an FTS5 shadow of the text columns when available
+    conn.execute("CREATE INDEX idx_records_opp ON records (opp_paragon)")
+    conn.execute("CREATE INDEX idx_records_mmr ON records (my_mmr)")
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE records_fts USING fts5(
+                my_paragon, opp_paragon, turn_order, result, my_mmr, date,
+                content='records', content_rowid='id'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5: search falls back to LIKE scans
+        return
+    conn.execute('''
+        CREATE TRIGGER records_fts_insert AFTER INSERT ON records
+        BEGIN
+            INSERT INTO records_fts (rowid, my_paragon, opp_paragon, turn_order, result, my_mmr, date)
+            VALUES (NEW.id, NEW.my_paragon, NEW.opp_paragon, NEW.turn_order, NEW.result, NEW.my_mmr, NEW.date);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER records_fts_delete AFTER DELETE ON records
+        BEGIN
+            INSERT INTO records_fts (records_fts, rowid, my_paragon, opp_paragon, turn_order, result, my_mmr, date)
+            VALUES ('delete', OLD.id, OLD.my_paragon, OLD.opp_paragon, OLD.turn_order, OLD.result, OLD.my_mmr, OLD.date);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER records_fts_update AFTER UPDATE ON records
+        BEGIN
+            INSERT INTO records_fts (records_fts, rowid, my_paragon, opp_paragon, turn_order, result, my_mmr, date)
+            VALUES ('delete', OLD.id, OLD.my_paragon, OLD.opp_paragon, OLD.turn_order, OLD.result, OLD.my_mmr, OLD.date);
+            INSERT INTO records_fts (rowid, my_paragon, opp_paragon, turn_order, result, my_mmr, date)
+            VALUES (NEW.id, NEW.my_paragon, NEW.opp_paragon, NEW.turn_order, NEW.result, NEW.my_mmr, NEW.date);
+        END
+    ''')
+    conn.execute("INSERT INTO records_fts (records_fts) VALUES ('rebuild')")
+
+def add_data_version(conn):
+    # Counter bumped by every committed write; caches compare it to detect stale results
+    conn.execute('''
+        CREATE TABLE meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    ''')
+    conn.execute("INSERT INTO meta (key, value) VALUES ('data_version', 0)")
+
+def add_change_journal(conn):
+    # Append-only log of record mutations; a batch is one committed unit of work that undo reverts.
+    # before/after hold the six record fields as a JSON list (NULL for the missing side).
+    conn.execute('''
+        CREATE TABLE change_journal (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            batch INTEGER NOT NULL,
+            record_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            before TEXT,
+            after TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute("CREATE INDEX idx_change_journal_batch ON change_journal (batch)")
+
+def add_database_id(conn):
+    # Random id telling this file apart from a recreated or restored one whose data_version
+    # restarted; state kept outside the file (the analysis disk cache) is scoped to it
+    conn.execute("INSERT INTO meta (key, value) VALUES ('database_id', ?)", (secrets.randbits(62),))
+
+MIGRATIONS = [
+    create_records,
+    create_matchup_stats,
+    add_typed_columns,
+    add_search_index,
+    add_data_version,
+    add_change_journal,
+    add_database_id,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    version = get_version(conn)
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(f"Database schema version {version} is newer than this application ({SCHEMA_VERSION})")
+
+    for number in range(version + 1, SCHEMA_VERSION + 1):
+        # One transaction per step: a failed migration leaves the previous version intact
+        conn.execute("BEGIN")
+        try:
+            MIGRATIONS[number - 1](conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
@@ -0,0 +1,75 @@
+import os
+import re
+import sqlite3
+from urllib.parse import quote
+
+# One profile per player/account: <profiles_dir>/<name>.db
+PROFILE_EXTENSION = ".db"
+PROFILE_NAME = re.compile(r"^[\w][\w .-]*$")
+
+# SQLite allows 10 attached databases by default; leave room for the main one
+MAX_ATTACHED = 9
+
+# matchup_stats arrived in schema version 2
+MIN_AGGREGATE_VERSION = 2
+
+class ProfileStore:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def names(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(os.path.splitext(entry)[0] for entry in os.listdir(self.directory)
+                      if entry.endswith(PROFILE_EXTENSION))
+
+    def path(self, name):
+        if not PROFILE_NAME.match(name):
+            raise ValueError(f"Invalid profile name '{name}': use letters, digits, spaces, '.', '-' or '_'")
+        return os.path.join(self.directory, name + PROFILE_EXTENSION)
+
+    def paths(self, names=None):
+        return [self.path(name) for name in (self.names() if names is None else names)]
+
+    @staticmethod
+    def name_of(db_path):
+        return os.path.splitext(os.path.basename(db_path))[0]
+
+def aggregate_matchup_stats(db_paths, batch_size=MAX_ATTACHED):
+    # Sums matchup_stats over many databases without copying them: each batch is attached
+    # read-only to one in-memory connection and grouped in a single UNION ALL query.
+    # Yields (my_paragon, opp_paragon, turn_order, matches, wins) like GROUPED_QUERY.
+    totals = {}
+    conn = sqlite3.connect("file::memory:", uri=True)
+    try:
+        for start in range(0, len(db_paths), batch_size):
+            batch = db_paths[start:start + batch_size]
+            schemas = []
+            try:
+                for index, db_path in enumerate(batch):
+                    if not os.path.exists(db_path):
+                        raise FileNotFoundError(f"No database at {db_path}")
+                    schema = f"profile{index}"
+                    uri = "file:" + quote(os.path.abspath(db_path)) + "?mode=ro"
+                    conn.execute("ATTACH DATABASE ? AS " + schema, (uri,))
+                    schemas.append(schema)
+                    if conn.execute(f"PRAGMA {schema}.user_version").fetchone()[0] < MIN_AGGREGATE_VERSION:
+                        raise ValueError(f"{db_path} has no matchup summary yet, open it once to migrate it")
+
+                union = " UNION ALL ".join(
+                    f"SELECT my_paragon, opp_paragon, turn_order, matches, wins FROM {schema}.matchup_stats"
+                    for schema in schemas)
+                rows = conn.execute(f'''
+                    SELECT my_paragon, opp_paragon, turn_order, SUM(matches), SUM(wins)
+                    FROM ({union}) GROUP BY my_paragon, opp_paragon, turn_order
+                ''')
+                for my_paragon, opp_paragon, turn_order, matches, wins in rows:
+                    entry = totals.setdefault((my_paragon, opp_paragon, turn_order), [0, 0])
+                    entry[0] += matches
+                    entry[1] += wins
+            finally:
+                for schema in schemas:
+                    conn.execute("DETACH DATABASE " + schema)
+    finally:
+        conn.close()
+    return [key + tuple(entry) for key, entry in totals.items()]
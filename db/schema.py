@@ -0,0 +1,22 @@
+from datetime import datetime
+from functools import lru_cache
+
+# Columns returned for a record everywhere in the app, in Treeview order
+RECORD_COLUMNS = "id, my_paragon, opp_paragon, turn_order, result, my_mmr, date"
+
+TURN_ORDER_CODES = {"OTP": 0, "OTD": 1}
+RESULT_CODES = {"LOSE": 0, "WIN": 1}
+
+REBUILD_MATCHUP_STATS = '''
+    INSERT INTO matchup_stats (my_paragon, opp_paragon, turn_order, matches, wins)
+    SELECT my_paragon, opp_paragon, turn_order, COUNT(*), SUM(result = 'WIN')
+    FROM records GROUP BY my_paragon, opp_paragon, turn_order
+'''
+
+@lru_cache(maxsize=4096)
+def to_iso_date(date_string):
+    # Records store dates as dd/mm/YYYY; the ISO copy sorts chronologically in SQL
+    try:
+        return datetime.strptime(date_string, "%d/%m/%Y").date().isoformat()
+    except (TypeError, ValueError):
+        return None
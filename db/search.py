@@ -0,0 +1,212 @@
+import calendar
+import re
+import shlex
+from datetime import date
+from db.schema import TURN_ORDER_CODES, RESULT_CODES, to_iso_date
+
+# Field names accepted in queries; anything else is rejected before it reaches SQL
+FIELD_ALIASES = {
+    "my": "my_paragon", "my_paragon": "my_paragon",
+    "opp": "opp_paragon", "opp_paragon": "opp_paragon",
+    "turn": "turn_order", "turn_order": "turn_order",
+    "result": "result",
+    "mmr": "my_mmr", "my_mmr": "my_mmr",
+    "date": "date",
+}
+
+SEARCH_FIELDS = ["all", "my_paragon", "opp_paragon", "turn_order", "result", "my_mmr", "date"]
+
+TERM_PATTERN = re.compile(r"^(?P<field>[a-z_]+):(?P<value>.*)$", re.IGNORECASE)
+OPERATOR_PATTERN = re.compile(r"^(?P<op>>=|<=|>|<|=)?(?P<value>.*)$")
+YEAR_PATTERN = re.compile(r"^\d{4}$")
+MONTH_PATTERN = re.compile(r"^(\d{1,2})/(\d{4})$")
+
+# Open ends of MMR and day ranges for the column store (its null marker sits just below)
+MIN_VALUE = -2**31 + 1
+MAX_VALUE = 2**31 - 1
+EPOCH = date(1970, 1, 1).toordinal()
+
+class SearchError(ValueError):
+    pass
+
+class ColumnFilter:
+    # A query without free text, kept both as SQL and in the terms of db.column_store:
+    # allowed values per categorical column and inclusive bounds per numeric column.
+    # DatabaseManager answers it from the column store when one is loaded, else from the SQL.
+    def __init__(self, sql, params):
+        self.sql = sql
+        self.params = params
+        self.values = {}
+        self.ranges = {}
+
+    def add(self, column, values=None, bounds=None):
+        # Repeated terms on a column narrow it, as the ANDed SQL clauses do
+        if values is not None:
+            allowed = self.values.get(column)
+            self.values[column] = [value for value in values if allowed is None or value in allowed]
+        if bounds is not None:
+            low, high = self.ranges.get(column, (MIN_VALUE, MAX_VALUE))
+            self.ranges[column] = (max(low, bounds[0]), min(high, bounds[1]))
+
+    def key(self):
+        return (tuple(sorted((column, tuple(values)) for column, values in self.values.items())),
+                tuple(sorted(self.ranges.items())))
+
+def parse_query(text, default_field="all"):
+    # "opp:Arak result:LOSE date:>=01/01/2026 jahn" -> [(field, op, value), ...]
+    try:
+        tokens = shlex.split(text)
+    except ValueError:
+        tokens = text.split()
+
+    terms = []
+    for token in tokens:
+        match = TERM_PATTERN.match(token)
+        if match:
+            field = FIELD_ALIASES.get(match.group("field").lower())
+            if field is None:
+                raise SearchError(f"Unknown search field '{match.group('field')}'")
+            token = match.group("value")
+        elif default_field == "all":
+            field = "all"
+        elif default_field in FIELD_ALIASES:
+            field = FIELD_ALIASES[default_field]
+        else:
+            raise SearchError(f"Unknown search field '{default_field}'")
+
+        match = OPERATOR_PATTERN.match(token)
+        op = match.group("op") or "="
+        value = match.group("value")
+        if value:
+            terms.append((field, op, value))
+    return terms
+
+def bounds(op, first, last):
+    # Inclusive (low, high) for a comparison against the period [first, last]
+    if op == ">":
+        return last + 1, MAX_VALUE
+    if op == ">=":
+        return first, MAX_VALUE
+    if op == "<":
+        return MIN_VALUE, first - 1
+    if op == "<=":
+        return MIN_VALUE, last
+    return first, last
+
+def day_number(iso_date):
+    # Days since 1970-01-01; month bounds end on day 31, which is clamped to the real last day
+    year, month, day = (int(part) for part in iso_date.split("-"))
+    return date(year, month, min(day, calendar.monthrange(year, month)[1])).toordinal() - EPOCH
+
+class SearchPlanner:
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    def plan(self, text, default_field="all"):
+        # Returns (where, params) for DatabaseManager.get_records_page, or (None, ()) for no filter.
+        # With the column store enabled, structured queries come back as (ColumnFilter, ()).
+        clauses = []
+        params = []
+        criteria = []
+        free_terms = []
+        for field, op, value in parse_query(text, default_field):
+            if field == "all":
+                free_terms.append(value)
+                continue
+            clause, clause_params, criterion = getattr(self, f"plan_{field}")(field, op, value)
+            clauses.append(clause)
+            params.extend(clause_params)
+            criteria.append(criterion)
+
+        if free_terms:
+            clause, clause_params = self.plan_full_text(free_terms)
+            clauses.append(clause)
+            params.extend(clause_params)
+
+        if not clauses:
+            return None, ()
+        where, params = " AND ".join(clauses), tuple(params)
+        if free_terms or not self.db_manager.config["column_store"]:
+            return where, params
+        column_filter = ColumnFilter(where, params)
+        for column, values, bounds in criteria:
+            column_filter.add(column, values, bounds)
+        return column_filter, ()
+
+    def plan_my_paragon(self, field, op, value):
+        return self.plan_categorical(field, op, value, self.db_manager.get_paragon_names())
+
+    def plan_opp_paragon(self, field, op, value):
+        return self.plan_categorical(field, op, value, self.db_manager.get_paragon_names())
+
+    def plan_turn_order(self, field, op, value):
+        return self.plan_categorical(field, op, value, list(TURN_ORDER_CODES))
+
+    def plan_result(self, field, op, value):
+        return self.plan_categorical(field, op, value, list(RESULT_CODES))
+
+    def plan_categorical(self, field, op, value, known_values):
+        # Resolve exact or prefix matches against the known values so the lookup is an indexed IN
+        if op != "=":
+            raise SearchError(f"'{field}' only supports exact or prefix matches")
+        lowered = value.lower()
+        matches = [known for known in known_values if known.lower() == lowered]
+        if not matches:
+            matches = [known for known in known_values if known.lower().startswith(lowered)]
+        if not matches:
+            return "0", (), (field, [], None)
+        return f"{field} IN ({', '.join('?' * len(matches))})", tuple(matches), (field, matches, None)
+
+    def plan_my_mmr(self, field, op, value):
+        if ".." in value:
+            low, high = value.split("..", 1)
+            low, high = self.parse_mmr(low), self.parse_mmr(high)
+            return "my_mmr BETWEEN ? AND ?", (low, high), ("my_mmr", None, (low, high))
+        mmr = self.parse_mmr(value)
+        return f"my_mmr {op} ?", (mmr,), ("my_mmr", None, bounds(op, mmr, mmr))
+
+    def parse_mmr(self, value):
+        if not value.isdigit():
+            raise SearchError(f"Invalid MMR '{value}'")
+        return int(value)
+
+    def plan_date(self, field, op, value):
+        if ".." in value:
+            low, high = value.split("..", 1)
+            first, last = self.parse_date(low)[0], self.parse_date(high)[1]
+            return "date_iso BETWEEN ? AND ?", (first, last), ("day", None, (day_number(first), day_number(last)))
+
+        first, last = self.parse_date(value)
+        criterion = ("day", None, bounds(op, day_number(first), day_number(last)))
+        if op == "=":
+            return "date_iso BETWEEN ? AND ?", (first, last), criterion
+        if op in (">", "<="):
+            return f"date_iso {op} ?", (last,), criterion
+        return f"date_iso {op} ?", (first,), criterion
+
+    def parse_date(self, value):
+        # A day, month (mm/YYYY) or year (YYYY) as the ISO bounds of that period
+        if YEAR_PATTERN.match(value):
+            return f"{value}-01-01", f"{value}-12-31"
+        match = MONTH_PATTERN.match(value)
+        if match:
+            month = f"{match.group(2)}-{int(match.group(1)):02d}"
+            return f"{month}-01", f"{month}-31"
+        iso_date = to_iso_date(value)
+        if iso_date is None:
+            raise SearchError(f"Invalid date '{value}', expected dd/mm/YYYY, mm/YYYY or YYYY")
+        return iso_date, iso_date
+
+    def plan_full_text(self, terms):
+        if self.db_manager.has_full_text_index():
+            expression = " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+            return "id IN (SELECT rowid FROM records_fts WHERE records_fts MATCH ?)", (expression,)
+
+        # Without FTS5 fall back to substring matches on the text columns
+        clauses = []
+        params = []
+        for term in terms:
+            clauses.append("(my_paragon LIKE ? OR opp_paragon LIKE ? OR turn_order LIKE ? "
+                           "OR result LIKE ? OR date LIKE ?)")
+            params.extend([f"%{term}%"] * 5)
+        return " AND ".join(clauses), tuple(params)
@@ -0,0 +1,93 @@
+# Client for a local ingestion server, for scripts and for testing it by hand:
+#   python -m ingest.client Arak Jahn OTP WIN 1500 01/06/2026
+#   python -m ingest.client --file games.jsonl
+import argparse
+import http.client
+import json
+import sys
+from db.importer import IMPORT_FIELDS
+from ingest.server import HOST, DEFAULT_PORT
+
+class IngestRequestError(Exception):
+    def __init__(self, status, payload):
+        errors = payload.get("errors")
+        if errors:
+            message = "; ".join(f"record {error['index']}: {error['error']}" for error in errors)
+        else:
+            message = payload.get("error", f"HTTP {status}")
+        super().__init__(message)
+        self.status = status
+        self.payload = payload
+
+class IngestClient:
+    # One keep-alive connection, reopened after an error. Not thread-safe: use one per thread.
+    def __init__(self, port=DEFAULT_PORT, timeout=10):
+        self.port = port
+        self.timeout = timeout
+        self.conn = None
+
+    def request(self, method, path, payload=None):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(HOST, self.port, timeout=self.timeout)
+        body = None if payload is None else json.dumps(payload)
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            self.conn.request(method, path, body, headers)
+            response = self.conn.getresponse()
+            data = json.loads(response.read() or b"{}")
+        except (OSError, http.client.HTTPException, ValueError):
+            self.close()
+            raise
+        if response.will_close:
+            self.close()
+        if response.status != 200:
+            raise IngestRequestError(response.status, data)
+        return data
+
+    def submit(self, records):
+        # Records as tuples in IMPORT_FIELDS order or as dicts; returns their new ids
+        payload = [record if isinstance(record, dict) else dict(zip(IMPORT_FIELDS, record)) for record in records]
+        return self.request("POST", "/records", payload)["ids"]
+
+    def health(self):
+        return self.request("GET", "/health")
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Submit match results to a running ingestion server")
+    parser.add_argument("fields", nargs="*", metavar="FIELD", help=" ".join(IMPORT_FIELDS))
+    parser.add_argument("--file", help="JSON lines file with one record object per line")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    if args.file:
+        records = read_jsonl(args.file)
+    elif len(args.fields) == len(IMPORT_FIELDS):
+        records = [tuple(args.fields)]
+    else:
+        parser.error(f"expected {len(IMPORT_FIELDS)} fields ({', '.join(IMPORT_FIELDS)}) or --file")
+
+    client = IngestClient(args.port)
+    try:
+        ids = client.submit(records)
+    except IngestRequestError as e:
+        print(f"rejected: {e}", file=sys.stderr)
+        return 1
+    except OSError as e:
+        print(f"cannot reach the ingestion server on port {args.port}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+    print(f"{len(ids)} records stored: {', '.join(map(str, ids))}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
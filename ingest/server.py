@@ -0,0 +1,283 @@
+# Local ingestion endpoint for overlay tools and scripts. Listens on 127.0.0.1 only.
+#   POST /records  one record object or an array of them, with the import field names
+#                  -> {"ids": [...]} once the records are committed
+#   GET  /health   -> {"status": "ok"}
+# Run without the GUI: python -m ingest.server [--db path] [--port 8765]
+import argparse
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from db.importer import IMPORT_FIELDS
+from utils.validation import validate_records
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 1 << 20
+# Records written per transaction at most; a busy server commits them in batches of up to this many
+MAX_BATCH_RECORDS = 5000
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+class IngestError(Exception):
+    def __init__(self, status, payload):
+        super().__init__(payload.get("error", REASONS[status]))
+        self.status = status
+        self.payload = payload
+
+def field_type_error(record):
+    # JSON allows any type; validation expects strings (and an integer MMR), and bool is an int
+    for field, value in zip(IMPORT_FIELDS, record):
+        if value is None or isinstance(value, str):
+            continue
+        if field == "my_mmr" and isinstance(value, int) and not isinstance(value, bool):
+            continue
+        return f"{field} must be a string" + (" or an integer" if field == "my_mmr" else "")
+    return None
+
+def parse_records(body):
+    # Request body -> record tuples in IMPORT_FIELDS order; nothing is stored unless every record is valid
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise IngestError(400, {"error": f"invalid JSON: {e}"})
+    items = payload if isinstance(payload, list) else [payload]
+    if not items:
+        raise IngestError(400, {"error": "no records"})
+
+    records = []
+    positions = []
+    errors = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append((index, "expected a JSON object"))
+            continue
+        record = tuple(item.get(field) for field in IMPORT_FIELDS)
+        reason = field_type_error(record)
+        if reason:
+            errors.append((index, reason))
+        else:
+            records.append(record)
+            positions.append(index)
+    errors.extend((positions[index], reason) for index, reason in validate_records(records))
+    if errors:
+        raise IngestError(400, {"errors": [{"index": index, "error": reason} for index, reason in sorted(errors)]})
+    return records
+
+def write_records(db_manager, records):
+    # One transaction, journaled like edits made in the form
+    with db_manager.transaction() as cursor:
+        return [db_manager.write_insert(cursor, record) for record in records]
+
+class IngestServer:
+    # Requests are parsed on an asyncio loop in a background thread and queued. One writer
+    # thread takes everything queued while the previous batch was committing and writes it in a
+    # single transaction, so the commit rate stays flat while submissions per commit grow with load.
+    # write(records) -> ids runs on that writer thread.
+    def __init__(self, write, port=DEFAULT_PORT, max_batch=MAX_BATCH_RECORDS):
+        self.write = write
+        self.port = port
+        self.max_batch = max_batch
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-writer")
+        self.loop = None
+        self.thread = None
+        self.ready = threading.Event()
+        self.error = None
+        self.batches = 0
+        # Connection handler task -> its stream writer
+        self.connections = {}
+
+    def start(self):
+        # Returns the bound port (useful with port=0) once the server accepts connections
+        self.thread = threading.Thread(target=self.run, name="ingest-server", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self.port
+
+    def stop(self):
+        if self.loop is not None and self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.finish)
+            self.thread.join()
+        self.writer.shutdown(wait=True)
+
+    def finish(self):
+        if not self.stopped.done():
+            self.stopped.set_result(None)
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self.serve())
+        finally:
+            self.loop.close()
+
+    async def serve(self):
+        self.pending = asyncio.Queue()
+        self.stopped = self.loop.create_future()
+        try:
+            server = await asyncio.start_server(self.handle, HOST, self.port)
+        except OSError as e:
+            self.error = e
+            self.ready.set()
+            return
+        self.port = server.sockets[0].getsockname()[1]
+        batches = asyncio.ensure_future(self.write_batches())
+        self.ready.set()
+        async with server:
+            await self.stopped
+            # Closing idle keep-alive connections ends their handlers, which would otherwise outlive the loop
+            for writer in self.connections.values():
+                writer.close()
+            await asyncio.gather(*self.connections, return_exceptions=True)
+        batches.cancel()
+
+    async def write_batches(self):
+        while True:
+            batch = [await self.pending.get()]
+            count = len(batch[0][0])
+            while count < self.max_batch and not self.pending.empty():
+                batch.append(self.pending.get_nowait())
+                count += len(batch[-1][0])
+
+            records = [record for item, future in batch for record in item]
+            try:
+                ids = await self.loop.run_in_executor(self.writer, self.write, records)
+            except Exception as e:
+                if len(batch) == 1:
+                    self.fail(batch[0][1], e)
+                    continue
+                # One bad request must not fail the others it was committed with
+                for item, future in batch:
+                    try:
+                        ids = await self.loop.run_in_executor(self.writer, self.write, item)
+                    except Exception as e:
+                        self.fail(future, e)
+                        continue
+                    self.batches += 1
+                    if not future.done():
+                        future.set_result(ids)
+                continue
+            self.batches += 1
+            start = 0
+            for item, future in batch:
+                if not future.done():
+                    future.set_result(ids[start:start + len(item)])
+                start += len(item)
+
+    def fail(self, future, error):
+        if not future.done():
+            future.set_exception(error)
+
+    async def handle(self, reader, writer):
+        # HTTP/1.1 with keep-alive, so a client can stream submissions over one connection
+        task = asyncio.current_task()
+        self.connections[task] = writer
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except IngestError as e:
+                    # Where the next request starts is unknown after a malformed one
+                    self.respond(writer, e.status, e.payload, False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, keep_alive, body = request
+                try:
+                    status, payload = await self.dispatch(method, path, body)
+                except IngestError as e:
+                    status, payload = e.status, e.payload
+                except Exception as e:
+                    # Answer rather than drop the connection; the next request may still succeed
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                self.respond(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.pop(task, None)
+            writer.close()
+
+    async def read_request(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if not e.partial:
+                return None
+            raise
+        except asyncio.LimitOverrunError:
+            raise IngestError(400, {"error": "request headers too large"})
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, path, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise IngestError(400, {"error": "malformed request line"})
+        headers = {}
+        for line in lines[1:]:
+            name, separator, value = line.partition(":")
+            if separator:
+                headers[name.strip().lower()] = value.strip()
+
+        length = headers.get("content-length", "0")
+        if not length.isdigit():
+            raise IngestError(400, {"error": "invalid Content-Length"})
+        if int(length) > MAX_BODY_BYTES:
+            raise IngestError(413, {"error": f"body larger than {MAX_BODY_BYTES} bytes"})
+        body = await reader.readexactly(int(length))
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        return method, path, keep_alive, body
+
+    async def dispatch(self, method, path, body):
+        path = path.split("?", 1)[0]
+        if path == "/health":
+            if method != "GET":
+                return 405, {"error": "use GET"}
+            return 200, {"status": "ok"}
+        if path == "/records":
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            records = parse_records(body)
+            future = self.loop.create_future()
+            self.pending.put_nowait((records, future))
+            try:
+                return 200, {"ids": await future}
+            except Exception as e:
+                return 500, {"error": str(e)}
+        return 404, {"error": f"no such endpoint '{path}'"}
+
+    def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+
+def main(argv=None):
+    from db.db_manager import DatabaseManager
+
+    parser = argparse.ArgumentParser(description="Accept match results over local HTTP")
+    parser.add_argument("--db", help="database file (defaults to config.json, PST_DB_PATH or db/data_system.db)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    db_manager = DatabaseManager(args.db)
+    server = IngestServer(lambda records: write_records(db_manager, records), port=args.port)
+    print(f"listening on http://{HOST}:{server.start()}")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        db_manager.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,20 @@
+import argparse
 from ui.ui_manager import UIManager
+from utils.profiling import run_profiled
 
 def main():
-    app = UIManager()
-    app.run()
+    parser = argparse.ArgumentParser(description="Parallel Self Tracker")
+    parser.add_argument("--db", help="database file (defaults to config.json, PST_DB_PATH or db/data_system.db)")
+    parser.add_argument("--ingest-port", type=int,
+                        help="accept match results over HTTP on 127.0.0.1 (defaults to ingest_port in the config)")
+    args = parser.parse_args()
+
+    app = UIManager(args.db)
+    port = args.ingest_port if args.ingest_port is not None else app.db_manager.config["ingest_port"]
+    if port:
+        print(f"ingestion server listening on port {app.start_ingest_server(port)}")
+    # PST_CPROFILE=out.prof records the whole session; PST_TRACE=1 enables the F12 timings panel
+    run_profiled(app.run)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,24 +1,44 @@
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import numpy as np
-import pandas as pd
-from collections import defaultdict
+import threading
 import customtkinter as ctk
 from tkinter import ttk
-import tkinter as tk
+from tkinter import filedialog, messagebox
+from analytics.matchups import matchup_matrix, matchup_matrix_profiles
+from analytics.cache import AnalysisCache
+from db.exporter import export_matchups
+from utils.profiling import timed
+
+# numpy and matplotlib are only needed once the analysis screen is used, so they are
+# imported on first use (or by prewarm) instead of on the path to the first window
+def import_analysis_modules():
+    import analytics.mmr
+    import analytics.trends
+    import ui.matchup_matrix_view
+    import ui.mmr_chart
+    import ui.trend_chart
+
+def prewarm():
+    threading.Thread(target=import_analysis_modules, name="prewarm-analysis", daemon=True).start()
+
+TREND_WINDOWS = {"Games": (5, 500, 50), "Days": (1, 180, 30)}
+WEEK_COLUMNS = ("Week", "Matches", "Wins", "Winrate")
 
 class AnalysisUI:
-    def __init__(self, parent, parent_root, db_manager):
+    PACK_OPTIONS = dict(fill="both", expand=True, padx=10, pady=10)
+
+    def __init__(self, parent, parent_root, executor):
         self.parent = parent
         self.parent_root = parent_root
-        self.db_manager = db_manager
+        self.executor = executor
+        # Results survive leaving the screen and restarts until the data version moves on
+        self.cache = AnalysisCache.for_database(executor.db_manager)
+        self.main_frame = None
+        # Data version of the analysis on screen, None until one has been generated
+        self.shown_version = None
         
     def setup_ui(self):
         # Create main frame
         self.main_frame = ctk.CTkFrame(self.parent_root)
-        self.main_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        self.main_frame.pack(**self.PACK_OPTIONS)
         
         # Create title
         title_label = ctk.CTkLabel(self.main_frame, text="Game Data Analysis", font=("Arial", 20, "bold"))
@@ -36,200 +56,289 @@ class AnalysisUI:
         analyze_btn = ctk.CTkButton(button_frame, text="Generate Analysis", command=self.generate_analysis)
         analyze_btn.pack(side="left", padx=5)
         
+        # Matchups summed over every profile
+        combine_btn = ctk.CTkButton(button_frame, text="All Profiles", command=self.combine_profiles)
+        combine_btn.pack(side="left", padx=5)
+        
+        # Export button
+        self.export_btn = ctk.CTkButton(button_frame, text="Export Analysis", command=self.export_analysis)
+        self.export_btn.pack(side="left", padx=5)
+        
         # Create scrollable frame to contain charts
         self.canvas_frame = ctk.CTkScrollableFrame(self.main_frame)
         self.canvas_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        # Status labels are rebuilt on every analysis; the heatmap and charts below them are created once and reused
+        self.tables_frame = ctk.CTkFrame(self.canvas_frame, fg_color="transparent")
+        self.tables_frame.pack(fill="x")
+        self.matrix_frame = ctk.CTkFrame(self.canvas_frame, fg_color="transparent")
+        self.matrix_view = None
+        self.mmr_frame = ctk.CTkFrame(self.canvas_frame, fg_color="transparent")
+        self.mmr_chart = None
+        self.trends_frame = ctk.CTkFrame(self.canvas_frame, fg_color="transparent")
+        self.trend_chart = None
+        self.games = None
+        self.trend_job = None
 
-    def reset_ui(self):
-        for widget in self.main_frame.winfo_children():
-            widget.destroy()
-        self.main_frame.pack_forget()
+    def export_analysis(self):
+        path = filedialog.asksaveasfilename(title="Export Matchup Matrix", defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Parquet", "*.parquet")])
+        if not path:
+            return
+        
+        self.export_btn.configure(state="disabled", text="Exporting...")
+        
+        def on_done(count):
+            self.export_btn.configure(state="normal", text="Export Analysis")
+            messagebox.showinfo("Export Finished", f"{count} matchups written to {path}")
         
+        def on_error(error):
+            self.export_btn.configure(state="normal", text="Export Analysis")
+            messagebox.showerror("Export Failed", str(error))
+        
+        self.executor.submit(lambda db_manager, task: export_matchups(db_manager, path),
+                             on_done=on_done, on_error=on_error)
+
     def back_to_main(self):
-        self.reset_ui()
-        self.parent.setup_ui()
+        self.parent.views.show("main")
+        
+    def on_show(self):
+        # Keep the analysis on screen unless records changed since it was generated
+        if self.shown_version is None:
+            return
+        
+        def on_done(version):
+            if version != self.shown_version:
+                self.generate_analysis()
+        
+        # Its own key: sharing "analysis" would cancel a generate still running and leave the
+        # screen on "Generating analysis..."
+        self.executor.submit(lambda db_manager, task: db_manager.get_data_version(),
+                             on_done=on_done, key="analysis-version")
+        
+    def set_db_manager(self, db_manager):
+        # Profile switched: nothing on screen or in the cache belongs to the new database
+        self.cache = AnalysisCache.for_database(db_manager)
+        self.shown_version = None
+        self.games = None
+        if self.main_frame is not None:
+            self.clear_analysis()
+            self.matrix_frame.pack_forget()
+            self.mmr_frame.pack_forget()
+            self.trends_frame.pack_forget()
+        
+    def combine_profiles(self):
+        paths = self.parent.profiles.paths()
+        self.clear_analysis()
+        loading_label = ctk.CTkLabel(self.tables_frame, text=f"Combining {len(paths)} profiles...")
+        loading_label.pack(pady=20)
+        
+        def on_done(matrix):
+            self.clear_analysis()
+            self.shown_version = None
+            self.mmr_frame.pack_forget()
+            self.trends_frame.pack_forget()
+            summary_label = ctk.CTkLabel(self.tables_frame, text=f"Matchups over {len(paths)} profiles",
+                                         font=("Arial", 16, "bold"))
+            summary_label.pack(pady=(20, 0))
+            self.create_matchup_view(matrix)
+        
+        def on_error(error):
+            self.clear_analysis()
+            messagebox.showerror("Combine Failed", str(error))
+        
+        self.executor.submit(lambda db_manager, task: matchup_matrix_profiles(paths),
+                             on_done=on_done, on_error=on_error, key="analysis")
         
     def generate_analysis(self):
-        # Clear previous content
-        for widget in self.canvas_frame.winfo_children():
+        self.clear_analysis()
+        loading_label = ctk.CTkLabel(self.tables_frame, text="Generating analysis...")
+        loading_label.pack(pady=20)
+        
+        # Queries run on a worker; pressing again cancels the pending run. The cache is taken now,
+        # like the db_manager the executor binds, so a run outliving a profile switch cannot fill
+        # the new profile's cache
+        cache = self.cache
+        self.executor.submit(lambda db_manager, task: self.compute_analysis(cache, db_manager, task),
+                             on_done=self.show_analysis, key="analysis")
+        
+    def clear_analysis(self):
+        for widget in self.tables_frame.winfo_children():
             widget.destroy()
-            print(widget)
-            
-        # Get all records
-        records = self.db_manager.get_all_records()
         
-        if not records:
-            no_data_label = ctk.CTkLabel(self.canvas_frame, text="No data available for analysis")
+    def compute_analysis(self, cache, db_manager, task):
+        from analytics.mmr import load_mmr_series
+        from analytics.trends import load_game_series
+        
+        # Worker thread: no widget access here. Each section is cached on its own so a
+        # cancelled run keeps whatever it finished
+        version = db_manager.get_data_version()
+        if not db_manager.has_records():
+            return version, None
+        matrix = cache.get_or_compute("matchups", version, lambda: matchup_matrix(db_manager))
+        task.check()
+        series = cache.get_or_compute("mmr", version, lambda: load_mmr_series(db_manager))
+        task.check()
+        games = cache.get_or_compute("games", version, lambda: load_game_series(db_manager))
+        return version, (matrix, series, games)
+        
+    @timed("ui.analysis.show_analysis")
+    def show_analysis(self, result):
+        self.clear_analysis()
+        self.shown_version, analysis = result
+            
+        if analysis is None:
+            self.matrix_frame.pack_forget()
+            self.mmr_frame.pack_forget()
+            self.trends_frame.pack_forget()
+            no_data_label = ctk.CTkLabel(self.tables_frame, text="No data available for analysis")
             no_data_label.pack(pady=20)
             return
             
         # Generate analysis
-        self.create_paragon_analysis_tables(records)
-        self.create_mmr_graph(records)
-        
-    def create_paragon_analysis_tables(self, records):
-        paragon_stats = defaultdict(lambda: defaultdict(lambda: {
-            'otp_matches': 0, 'otp_wins': 0, 'otd_matches': 0, 'otd_wins': 0
-        }))
-        
-        for record in records:
-            my_paragon = record[1]
-            opp_paragon = record[2]
-            turn_order = record[3]
-            result = record[4]
-            
-            is_win = result == "WIN"
-            
-            if turn_order == "OTP":
-                paragon_stats[my_paragon][opp_paragon]['otp_matches'] += 1
-                if is_win:
-                    paragon_stats[my_paragon][opp_paragon]['otp_wins'] += 1
-            else:  # OTD
-                paragon_stats[my_paragon][opp_paragon]['otd_matches'] += 1
-                if is_win:
-                    paragon_stats[my_paragon][opp_paragon]['otd_wins'] += 1
-        
-        # Create table for each of my paragons
-        for my_paragon in paragon_stats:
-            # Create paragon title
-            paragon_title = ctk.CTkLabel(self.canvas_frame, text=f"{my_paragon} Analysis", 
-                                       font=("Arial", 16, "bold"))
-            paragon_title.pack(pady=(20, 10))
-            
-            # Create table frame
-            table_frame = ctk.CTkFrame(self.canvas_frame)
-            table_frame.pack(fill="x", padx=10, pady=5)
-            
-            # Create table
-            columns = ("Opp's Paragon", "Total Matches", "Total Winrate", "OTP Matches", "OTP Wins", "OTP Winrate", "OTD Matches", "OTD Wins", "OTD Winrate")
-            tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=len(paragon_stats[my_paragon]) + 1)
-            
-            # Set column titles
-            for col in columns:
-                tree.heading(col, text=col)
-                tree.column(col, width=100, anchor="center")
-            
-            # Calculate total data
-            total_otp_matches = 0
-            total_otp_wins = 0
-            total_otd_matches = 0
-            total_otd_wins = 0
-            
-            for stats in paragon_stats[my_paragon].values():
-                total_otp_matches += stats['otp_matches']
-                total_otp_wins += stats['otp_wins']
-                total_otd_matches += stats['otd_matches']
-                total_otd_wins += stats['otd_wins']
-            
-            # Add total row
-            total_otp_winrate = (total_otp_wins / total_otp_matches * 100) if total_otp_matches > 0 else 0
-            total_otd_winrate = (total_otd_wins / total_otd_matches * 100) if total_otd_matches > 0 else 0
-            total_matches = total_otp_matches + total_otd_matches
-            total_wins = total_otp_wins + total_otd_wins
-            total_winrate = (total_wins / total_matches * 100) if total_matches > 0 else 0
-            
-            tree.insert("", "end", values=(
-                "Overall",
-                total_matches,
-                f"{total_winrate:.1f}%",
-                total_otp_matches,
-                total_otp_wins,
-                f"{total_otp_winrate:.1f}%",
-                total_otd_matches,
-                total_otd_wins,
-                f"{total_otd_winrate:.1f}%",
-            ), tags=('total',))
-            
-            # Add data
-            for opp_paragon, stats in paragon_stats[my_paragon].items():
-                otp_matches = stats['otp_matches']
-                otp_wins = stats['otp_wins']
-                otp_winrate = (otp_wins / otp_matches * 100) if otp_matches > 0 else 0
-                
-                otd_matches = stats['otd_matches']
-                otd_wins = stats['otd_wins']
-                otd_winrate = (otd_wins / otd_matches * 100) if otd_matches > 0 else 0
-                
-                total_matches = otp_matches + otd_matches
-                total_wins = otp_wins + otd_wins
-                total_winrate = (total_wins / total_matches * 100) if total_matches > 0 else 0
-                
-                tree.insert("", "end", values=(
-                    opp_paragon,
-                    total_matches,
-                    f"{total_winrate:.1f}%",
-                    otp_matches,
-                    otp_wins,
-                    f"{otp_winrate:.1f}%",
-                    otd_matches,
-                    otd_wins,
-                    f"{otd_winrate:.1f}%"
-                ))
-            
-            # Set total row style
-            tree.tag_configure('total', background='lightgray', font=('Arial', 10, 'bold'))
+        matrix, series, games = analysis
+        self.create_matchup_view(matrix)
+        self.create_mmr_graph(series)
+        self.create_trends(games)
+        
+    def create_matchup_view(self, matrix):
+        if self.matrix_view is None:
+            from ui.matchup_matrix_view import MatchupMatrixView
             
-            # Add scrollbar
-            scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
-            tree.configure(yscrollcommand=scrollbar.set)
+            matrix_title = ctk.CTkLabel(self.matrix_frame, text="Matchups", font=("Arial", 16, "bold"))
+            matrix_title.pack(pady=(20, 10))
+            self.matrix_view = MatchupMatrixView(self.matrix_frame)
+            self.matrix_view.pack(fill="x", padx=10, pady=5)
+        self.matrix_frame.pack(fill="x")
+        self.matrix_view.show(matrix)
             
-            tree.pack(side="left", fill="both", expand=True)
-            scrollbar.pack(side="right", fill="y")
+    def create_mmr_graph(self, series):
+        if self.mmr_chart is None:
+            from ui.mmr_chart import MMRChart
             
-    def create_mmr_graph(self, records):
-        # Create MMR graph title
-        mmr_title = ctk.CTkLabel(self.canvas_frame, text="MMR Changes", 
-                               font=("Arial", 16, "bold"))
-        mmr_title.pack(pady=(30, 10))
-        
-        # Prepare data: only include MMR > 1000
-        dates = []
-        mmrs = []
-        
-        for record in records:
-            date = record[6]  # date column
-            mmr = record[5]   # mmr column
+            # Create MMR graph title
+            mmr_title = ctk.CTkLabel(self.mmr_frame, text="MMR Changes", 
+                                   font=("Arial", 16, "bold"))
+            mmr_title.pack(pady=(30, 10))
             
-            try:
-                mmr_int = int(mmr)
-                if mmr_int > 1000:
-                    dates.append(date)
-                    mmrs.append(mmr_int)
-            except ValueError:
-                continue
-        
-        if not dates:
-            no_mmr_label = ctk.CTkLabel(self.canvas_frame, text="No valid MMR data")
-            no_mmr_label.pack(pady=10)
+            self.no_mmr_label = ctk.CTkLabel(self.mmr_frame, text="No valid MMR data")
+            self.mmr_chart = MMRChart(self.mmr_frame)
+        self.mmr_frame.pack(fill="both", expand=True)
+        
+        if not len(series):
+            self.mmr_chart.frame.pack_forget()
+            self.no_mmr_label.pack(pady=10)
             return
         
-        # Create matplotlib chart
-        fig = Figure(figsize=(12, 6))
-        ax = fig.add_subplot(111)
-        
-        # Plot MMR line
-        ax.plot(range(len(dates)), mmrs, linewidth=2)
-        
-        # Set title and labels
-        ax.set_title('MMR changes', fontsize=14, fontweight='bold')
-        ax.set_xlabel('Date', fontsize=12)
-        ax.set_ylabel('MMR', fontsize=12)
-        
-        # Set x-axis labels (show every 10th date)
-        if len(dates) > 10:
-            step = len(dates) // 10
-            x_positions = list(range(0, len(dates), step))
-            x_labels = [dates[i] for i in x_positions]
-            ax.set_xticks(x_positions)
-            ax.set_xticklabels(x_labels, rotation=45)
-        else:
-            ax.set_xticks(range(len(dates)))
-            ax.set_xticklabels(dates, rotation=45)
+        self.no_mmr_label.pack_forget()
+        self.mmr_chart.pack(fill="both", expand=True, padx=10, pady=10)
+        self.mmr_chart.set_series(series)
         
-        #Add grid
-        ax.grid(True, alpha=0.3)
+    def create_trends(self, games):
+        if self.trend_chart is None:
+            self.create_trend_controls()
+        self.trends_frame.pack(fill="both", expand=True)
+        
+        self.games = games
+        choices = ["Any"] + sorted(games.paragon_ids)
+        self.trend_my_combo.configure(values=choices)
+        self.trend_opp_combo.configure(values=choices)
+        self.update_trends()
+        
+    def create_trend_controls(self):
+        from ui.trend_chart import TrendChart
+        
+        trend_title = ctk.CTkLabel(self.trends_frame, text="Winrate Trends", font=("Arial", 16, "bold"))
+        trend_title.pack(pady=(30, 10))
+        
+        # Filters: matchup and turn order
+        filter_frame = ctk.CTkFrame(self.trends_frame)
+        filter_frame.pack(fill="x", padx=10, pady=5)
+        self.trend_my_var = ctk.StringVar(value="Any")
+        self.trend_opp_var = ctk.StringVar(value="Any")
+        self.trend_turn_var = ctk.StringVar(value="Both")
+        ctk.CTkLabel(filter_frame, text="My Paragon:").pack(side="left", padx=5)
+        self.trend_my_combo = ctk.CTkComboBox(filter_frame, variable=self.trend_my_var, width=140,
+                                              command=lambda choice: self.schedule_trends())
+        self.trend_my_combo.pack(side="left", padx=5)
+        ctk.CTkLabel(filter_frame, text="Opponent:").pack(side="left", padx=5)
+        self.trend_opp_combo = ctk.CTkComboBox(filter_frame, variable=self.trend_opp_var, width=140,
+                                               command=lambda choice: self.schedule_trends())
+        self.trend_opp_combo.pack(side="left", padx=5)
+        ctk.CTkSegmentedButton(filter_frame, values=["Both", "OTP", "OTD"], variable=self.trend_turn_var,
+                               command=lambda choice: self.schedule_trends()).pack(side="left", padx=5)
+        
+        # Window: last N games or last N days, and the MMR band width
+        window_frame = ctk.CTkFrame(self.trends_frame)
+        window_frame.pack(fill="x", padx=10, pady=5)
+        self.trend_mode_var = ctk.StringVar(value="Games")
+        ctk.CTkSegmentedButton(window_frame, values=list(TREND_WINDOWS), variable=self.trend_mode_var,
+                               command=self.change_trend_mode).pack(side="left", padx=5)
+        low, high, default = TREND_WINDOWS["Games"]
+        self.trend_window_var = ctk.IntVar(value=default)
+        self.trend_window_slider = ctk.CTkSlider(window_frame, from_=low, to=high, number_of_steps=high - low,
+                                                 variable=self.trend_window_var,
+                                                 command=lambda value: self.schedule_trends())
+        self.trend_window_slider.pack(side="left", padx=5)
+        self.trend_window_label = ctk.CTkLabel(window_frame, text="")
+        self.trend_window_label.pack(side="left", padx=5)
+        self.trend_band_var = ctk.IntVar(value=100)
+        ctk.CTkSlider(window_frame, from_=50, to=500, number_of_steps=9, variable=self.trend_band_var,
+                      command=lambda value: self.schedule_trends()).pack(side="right", padx=5)
+        self.trend_band_label = ctk.CTkLabel(window_frame, text="")
+        self.trend_band_label.pack(side="right", padx=5)
+        
+        self.trend_chart = TrendChart(self.trends_frame)
+        self.trend_chart.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        # Weekly winrate, most recent week first
+        week_frame = ctk.CTkFrame(self.trends_frame)
+        week_frame.pack(fill="x", padx=10, pady=5)
+        self.week_tree = ttk.Treeview(week_frame, columns=WEEK_COLUMNS, show="headings", height=8)
+        for col in WEEK_COLUMNS:
+            self.week_tree.heading(col, text=col)
+            self.week_tree.column(col, width=100, anchor="center")
+        week_scrollbar = ttk.Scrollbar(week_frame, orient="vertical", command=self.week_tree.yview)
+        self.week_tree.configure(yscrollcommand=week_scrollbar.set)
+        self.week_tree.pack(side="left", fill="both", expand=True)
+        week_scrollbar.pack(side="right", fill="y")
+        
+    def change_trend_mode(self, mode):
+        low, high, default = TREND_WINDOWS[mode]
+        self.trend_window_slider.configure(from_=low, to=high, number_of_steps=high - low)
+        self.trend_window_var.set(default)
+        self.schedule_trends()
+        
+    def schedule_trends(self, delay=30):
+        # Sliders fire on every pixel of movement; recompute once it pauses
+        if self.trend_job is not None:
+            self.parent_root.after_cancel(self.trend_job)
+        self.trend_job = self.parent_root.after(delay, self.update_trends)
+        
+    @timed("ui.analysis.update_trends")
+    def update_trends(self):
+        # Runs on the UI thread: every statistic is computed from the in-memory game arrays
+        self.trend_job = None
+        if self.games is None:
+            return
+        
+        def choice(var, any_value):
+            value = var.get()
+            return None if value == any_value else value
+        
+        games = self.games.select(choice(self.trend_my_var, "Any"), choice(self.trend_opp_var, "Any"),
+                                  choice(self.trend_turn_var, "Both"))
+        mode = self.trend_mode_var.get()
+        window = int(self.trend_window_var.get())
+        band_width = int(self.trend_band_var.get())
+        if mode == "Games":
+            rates = games.rolling_games(window)
+        else:
+            rates = games.rolling_days(window)
+        self.trend_window_label.configure(text=f"Last {window} {mode.lower()}")
+        self.trend_band_label.configure(text=f"MMR band {band_width}")
+        self.trend_chart.show(games.dates(), rates, games.by_mmr_band(band_width), band_width)
         
-        # Embed matplotlib chart into tkinter
-        canvas = FigureCanvasTkAgg(fig, self.canvas_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
\ No newline at end of file
+        self.week_tree.delete(*self.week_tree.get_children())
+        for week, matches, wins, rate in reversed(games.by_week()):
+            self.week_tree.insert("", "end", values=(week, matches, wins, f"{rate:.1f}%"))
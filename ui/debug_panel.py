@@ -0,0 +1,95 @@
+import customtkinter as ctk
+from tkinter import ttk
+from tkinter import filedialog, messagebox
+from utils import profiling
+
+COUNTER_COLUMNS = ("Span", "Calls", "Total ms", "Mean ms", "Max ms")
+SLOW_COLUMNS = ("Query", "ms", "Plan")
+
+class DebugPanel:
+    # Live view of the profiling counters and slow queries (F12). Needs PST_TRACE=1.
+    def __init__(self, root, refresh_interval=1000):
+        self.root = root
+        self.refresh_interval = refresh_interval
+        self.window = None
+        self.refresh_job = None
+
+    def toggle(self):
+        if self.window is not None:
+            self.close()
+            return
+        if profiling.profiler is None:
+            messagebox.showinfo("Profiling Disabled", "Start the application with PST_TRACE=1 to collect timings")
+            return
+        self.build()
+        self.refresh()
+
+    def build(self):
+        self.window = ctk.CTkToplevel(self.root)
+        self.window.title("Debug: Timings")
+        self.window.geometry("900x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        button_frame = ctk.CTkFrame(self.window)
+        button_frame.pack(fill="x", padx=10, pady=5)
+        ctk.CTkButton(button_frame, text="Reset", command=self.reset, width=80).pack(side="left", padx=5)
+        ctk.CTkButton(button_frame, text="Save Counters", command=self.save_counters).pack(side="left", padx=5)
+        ctk.CTkButton(button_frame, text="Save Chrome Trace", command=self.save_trace).pack(side="left", padx=5)
+
+        self.counter_tree = self.create_table(COUNTER_COLUMNS, height=15)
+        self.counter_tree.column("Span", width=300, anchor="w")
+        self.slow_tree = self.create_table(SLOW_COLUMNS, height=8)
+        self.slow_tree.column("Query", width=300, anchor="w")
+        self.slow_tree.column("Plan", width=400, anchor="w")
+
+    def create_table(self, columns, height):
+        frame = ctk.CTkFrame(self.window)
+        frame.pack(fill="both", expand=True, padx=10, pady=5)
+        tree = ttk.Treeview(frame, columns=columns, show="headings", height=height)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=90, anchor="e")
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        return tree
+
+    def refresh(self):
+        self.refresh_job = self.root.after(self.refresh_interval, self.refresh)
+        counters, slow_queries = profiling.profiler.snapshot()
+
+        self.counter_tree.delete(*self.counter_tree.get_children())
+        for name, calls, total, longest in counters:
+            mean = total / calls if calls else 0
+            self.counter_tree.insert("", "end", values=(name, calls, f"{total * 1000:.1f}",
+                                                        f"{mean * 1000:.2f}", f"{longest * 1000:.1f}"))
+
+        self.slow_tree.delete(*self.slow_tree.get_children())
+        for entry in reversed(slow_queries):
+            for statement in entry["statements"] or [{"sql": entry["name"], "plan": None}]:
+                plan = "; ".join(statement["plan"] or [])
+                self.slow_tree.insert("", "end", values=(statement["sql"], f"{entry['ms']:.1f}", plan))
+
+    def reset(self):
+        profiling.profiler.reset()
+
+    def save_counters(self):
+        path = filedialog.asksaveasfilename(title="Save Counters", defaultextension=".json",
+                                            filetypes=[("JSON", "*.json")])
+        if path:
+            profiling.profiler.dump_counters(path)
+
+    def save_trace(self):
+        path = filedialog.asksaveasfilename(title="Save Chrome Trace", defaultextension=".json",
+                                            filetypes=[("Chrome trace", "*.json")])
+        if path:
+            profiling.profiler.dump_chrome_trace(path)
+
+    def close(self):
+        if self.refresh_job is not None:
+            self.root.after_cancel(self.refresh_job)
+            self.refresh_job = None
+        if self.window is not None:
+            self.window.destroy()
+            self.window = None
@@ -0,0 +1,146 @@
+import numpy as np
+import tkinter as tk
+import customtkinter as ctk
+from tkinter import ttk
+from analytics.matchups import TABLE_COLUMNS, format_table_row
+from utils.validation import get_paragon_registry
+from utils.profiling import timed
+
+CELL_SIZE = 44
+LABEL_WIDTH = 100
+HEADER_HEIGHT = 80
+TURN_MODES = ("Both", "OTP", "OTD")
+
+# Win rate colour scale: 0% red, 50% white, 100% green; unplayed matchups grey
+LOW_COLOR = np.array((214, 96, 77))
+MID_COLOR = np.array((247, 247, 247))
+HIGH_COLOR = np.array((77, 172, 38))
+EMPTY_COLOR = "#d0d0d0"
+
+def heat_colors(rates, matches):
+    # Hex colours for every cell, row-major
+    scale = np.clip(rates / 50.0 - 1.0, -1.0, 1.0)[..., None]
+    rgb = np.where(scale < 0, MID_COLOR + (LOW_COLOR - MID_COLOR) * -scale,
+                   MID_COLOR + (HIGH_COLOR - MID_COLOR) * scale)
+    colors = ["#%02x%02x%02x" % tuple(color) for color in rgb.reshape(-1, 3).astype(int)]
+    return [color if played else EMPTY_COLOR for color, played in zip(colors, matches.ravel() > 0)]
+
+class MatchupMatrixView:
+    # Every paragon of mine against every opponent as one heatmap on a single canvas. Cell items
+    # are created once per set of paragons; a new matrix or turn order toggle only recolours them,
+    # so drawing costs the same however many games or matchups there are. A click on a cell fills
+    # the detail table for that matchup.
+    def __init__(self, master):
+        self.names = []
+        self.cells = []
+        self.matches = None
+        self.wins = None
+        self.selected = None
+
+        self.frame = ctk.CTkFrame(master, fg_color="transparent")
+        controls = ctk.CTkFrame(self.frame)
+        controls.pack(fill="x", pady=5)
+        self.turn_var = ctk.StringVar(value="Both")
+        ctk.CTkSegmentedButton(controls, values=list(TURN_MODES), variable=self.turn_var,
+                               command=lambda choice: self.redraw()).pack(side="left", padx=5)
+        ctk.CTkLabel(controls, text="Rows: my paragon, columns: opponent. Click a cell for details.").pack(
+            side="left", padx=10)
+
+        self.canvas = tk.Canvas(self.frame, background="white", highlightthickness=0)
+        self.canvas.pack(pady=5)
+        self.canvas.bind("<Button-1>", self.on_click)
+
+        self.detail_tree = ttk.Treeview(self.frame, columns=TABLE_COLUMNS, show="headings", height=2)
+        for col in TABLE_COLUMNS:
+            self.detail_tree.heading(col, text=col)
+            self.detail_tree.column(col, width=100, anchor="center")
+        self.detail_tree.tag_configure('total', background='lightgray', font=('Arial', 10, 'bold'))
+        self.detail_tree.pack(fill="x", pady=5)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    @timed("ui.matchup_matrix.show")
+    def show(self, matrix):
+        names = sorted(set(get_paragon_registry()) | set(matrix.columns["my_paragon"]) |
+                       set(matrix.columns["opp_paragon"]))
+        if names != self.names:
+            self.names = names
+            self.selected = None
+            self.build_grid()
+        self.matches, self.wins = matrix.grid(names, names)
+        self.redraw()
+        self.show_detail()
+
+    def build_grid(self):
+        self.canvas.delete("all")
+        count = len(self.names)
+        for index, name in enumerate(self.names):
+            middle = index * CELL_SIZE + CELL_SIZE / 2
+            self.canvas.create_text(LABEL_WIDTH - 6, HEADER_HEIGHT + middle, text=name, anchor="e",
+                                    font=("Arial", 10))
+            self.canvas.create_text(LABEL_WIDTH + middle, HEADER_HEIGHT - 6, text=name, anchor="w", angle=45,
+                                    font=("Arial", 10))
+
+        self.cells = []
+        for row in range(count):
+            for column in range(count):
+                x = LABEL_WIDTH + column * CELL_SIZE
+                y = HEADER_HEIGHT + row * CELL_SIZE
+                rect = self.canvas.create_rectangle(x, y, x + CELL_SIZE, y + CELL_SIZE, outline="white")
+                text = self.canvas.create_text(x + CELL_SIZE / 2, y + CELL_SIZE / 2, font=("Arial", 8),
+                                               justify="center")
+                self.cells.append((rect, text))
+        self.highlight = self.canvas.create_rectangle(0, 0, 0, 0, outline="black", width=2, state="hidden")
+        self.canvas.configure(width=LABEL_WIDTH + count * CELL_SIZE + HEADER_HEIGHT,
+                              height=HEADER_HEIGHT + count * CELL_SIZE + 5)
+
+    def turn_counts(self, matches, wins):
+        # Counts for the turn order picked in the toggle, summed for "Both"
+        mode = self.turn_var.get()
+        if mode == "Both":
+            return matches.sum(axis=-1), wins.sum(axis=-1)
+        index = TURN_MODES.index(mode) - 1
+        return matches[..., index], wins[..., index]
+
+    @timed("ui.matchup_matrix.redraw")
+    def redraw(self):
+        if self.matches is None:
+            return
+        matches, wins = self.turn_counts(self.matches, self.wins)
+        rates = np.divide(wins * 100.0, matches, out=np.zeros(matches.shape), where=matches > 0)
+        colors = heat_colors(rates, matches)
+        for (rect, text), color, played, rate in zip(self.cells, colors, matches.ravel(), rates.ravel()):
+            self.canvas.itemconfigure(rect, fill=color)
+            self.canvas.itemconfigure(text, text=f"{rate:.0f}%\n{played}" if played else "")
+
+    def on_click(self, event):
+        row = int((event.y - HEADER_HEIGHT) // CELL_SIZE)
+        column = int((event.x - LABEL_WIDTH) // CELL_SIZE)
+        if event.x < LABEL_WIDTH or event.y < HEADER_HEIGHT or row >= len(self.names) or column >= len(self.names):
+            return
+        self.selected = (row, column)
+        self.show_detail()
+
+    def show_detail(self):
+        # Overall row for my paragon, then the clicked matchup; built only for the selected cell
+        self.detail_tree.delete(*self.detail_tree.get_children())
+        if self.selected is None or self.matches is None:
+            self.canvas.itemconfigure(self.highlight, state="hidden")
+            return
+        row, column = self.selected
+        x = LABEL_WIDTH + column * CELL_SIZE
+        y = HEADER_HEIGHT + row * CELL_SIZE
+        self.canvas.coords(self.highlight, x, y, x + CELL_SIZE, y + CELL_SIZE)
+        self.canvas.itemconfigure(self.highlight, state="normal")
+        self.canvas.tag_raise(self.highlight)
+
+        my_paragon = self.names[row]
+        totals_matches = self.matches[row].sum(axis=0).tolist()
+        totals_wins = self.wins[row].sum(axis=0).tolist()
+        matches = self.matches[row, column].tolist()
+        wins = self.wins[row, column].tolist()
+        self.detail_tree.insert("", "end", tags=('total',), values=format_table_row(
+            f"{my_paragon} overall", totals_matches[0], totals_wins[0], totals_matches[1], totals_wins[1]))
+        self.detail_tree.insert("", "end", values=format_table_row(
+            f"{my_paragon} vs {self.names[column]}", matches[0], wins[0], matches[1], wins[1]))
@@ -0,0 +1,112 @@
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+import tkinter as tk
+from utils.profiling import timed
+
+class MMRChart:
+    # One figure and one line artist for the lifetime of the analysis screen. Only about one
+    # point per horizontal pixel is drawn; zooming or panning re-samples the visible range.
+    def __init__(self, master):
+        self.series = None
+        self.resample_job = None
+        self.background = None
+
+        self.figure = Figure(figsize=(12, 6))
+        self.ax = self.figure.add_subplot(111)
+        # Animated: left out of full redraws and painted over the cached background instead
+        self.line, = self.ax.plot([], [], linewidth=2, animated=True)
+
+        # Set title and labels
+        self.ax.set_title('MMR changes', fontsize=14, fontweight='bold')
+        self.ax.set_xlabel('Date', fontsize=12)
+        self.ax.set_ylabel('MMR', fontsize=12)
+        self.ax.xaxis.set_major_locator(MaxNLocator(10, integer=True))
+        self.ax.xaxis.set_major_formatter(FuncFormatter(self.format_date))
+        self.ax.tick_params(axis='x', labelrotation=45)
+        self.ax.grid(True, alpha=0.3)
+        self.figure.tight_layout()
+
+        self.frame = tk.Frame(master)
+        self.canvas = FigureCanvasTkAgg(self.figure, self.frame)
+        self.toolbar = NavigationToolbar2Tk(self.canvas, self.frame, pack_toolbar=False)
+        self.toolbar.pack(side="bottom", fill="x")
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+
+        self.ax.callbacks.connect('xlim_changed', self.schedule_resample)
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def format_date(self, value, position):
+        index = int(round(value))
+        if self.series is None or not 0 <= index < len(self.series):
+            return ""
+        return self.series.dates[index]
+
+    def pixel_width(self):
+        return max(int(self.ax.bbox.width), 100)
+
+    @timed("ui.mmr_chart.set_series")
+    def set_series(self, series):
+        previous, self.series = self.series, series
+        if series.extends(previous) and self.background is not None and self.showing_end(previous):
+            self.append(previous)
+            return
+
+        self.ax.set_xlim(0, max(len(series) - 1, 1))
+        self.resample()
+        self.ax.relim()
+        self.ax.autoscale_view(scalex=False)
+        self.canvas.draw_idle()
+
+    def showing_end(self, previous):
+        return self.ax.get_xlim()[1] >= len(previous) - 1
+
+    def append(self, previous):
+        # New games only: extend the drawn line and blit it over the cached background
+        new_x = self.series.x[len(previous):]
+        new_mmr = self.series.mmr[len(previous):]
+        x = list(self.line.get_xdata()) + list(new_x)
+        y = list(self.line.get_ydata()) + list(new_mmr)
+        self.line.set_data(x, y)
+
+        left, right = self.ax.get_xlim()
+        bottom, top = self.ax.get_ylim()
+        if new_x[-1] > right or new_mmr.min() < bottom or new_mmr.max() > top:
+            # The new points fall outside the axes, so the ticks have to be redrawn as well
+            self.ax.set_xlim(left, max(len(self.series) - 1, right))
+            self.ax.relim()
+            self.ax.autoscale_view(scalex=False)
+            self.canvas.draw_idle()
+            return
+
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
+
+    def schedule_resample(self, ax=None):
+        # Zoom/pan fire many xlim changes; re-sample once the interaction settles
+        if self.resample_job is not None:
+            self.frame.after_cancel(self.resample_job)
+        self.resample_job = self.frame.after(50, self.on_resample)
+
+    @timed("ui.mmr_chart.resample")
+    def on_resample(self):
+        self.resample_job = None
+        self.resample()
+        self.canvas.draw_idle()
+
+    def resample(self):
+        if self.series is None:
+            return
+        left, right = self.ax.get_xlim()
+        x, mmr = self.series.window(left, right, self.pixel_width())
+        self.line.set_data(x, mmr)
+
+    def on_draw(self, event):
+        # Cache everything except the line so appends only redraw the line itself
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
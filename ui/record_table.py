@@ -0,0 +1,154 @@
+from bisect import bisect_left
+from utils.profiling import timed, count
+
+class RecordTable:
+    def __init__(self, tree, scrollbar, executor, page_size=200, max_pages=5):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.executor = executor
+        self.page_size = page_size
+        self.max_rows = page_size * max_pages
+
+        self.where = None
+        self.params = ()
+        self.first_id = 0
+        self.last_id = 0
+        self.has_before = False
+        self.has_after = False
+        self.loading = False
+        # Bumped on every reset so row patches computed for an older query are dropped
+        self.generation = 0
+
+        self.tree.configure(yscrollcommand=self.on_scroll)
+
+    def reset(self, where=None, params=()):
+        # Drop the current window and materialize the first page of the new query
+        self.where = where
+        self.params = tuple(params)
+        self.generation += 1
+        self.tree.delete(*self.tree.get_children())
+        self.first_id = 0
+        self.last_id = 0
+        self.has_before = False
+        self.has_after = True
+        self.loading = False
+        self.fetch_after()
+        self.tree.yview_moveto(0)
+
+    def fetch_page(self, on_done, after_id=0, before_id=None):
+        # Pages are read on a worker; a newer page request or reset cancels a pending one
+        self.loading = True
+        where, params, page_size = self.where, self.params, self.page_size
+        self.executor.submit(
+            lambda db_manager, task: db_manager.get_records_page(after_id, page_size, where, params, before_id),
+            on_done=on_done, on_error=self.on_fetch_error, key=("record-table", id(self)))
+
+    def on_fetch_error(self, error):
+        self.loading = False
+        raise error
+
+    def fetch_after(self):
+        if not self.has_after or self.loading:
+            return
+        self.fetch_page(self.append_page, after_id=self.last_id)
+
+    @timed("ui.record_table.append_page")
+    def append_page(self, records):
+        count("ui.record_table.rows_fetched", len(records))
+        self.loading = False
+        for record in records:
+            if not self.tree.exists(str(record[0])):
+                self.tree.insert("", "end", iid=str(record[0]), values=record)
+        if records:
+            self.last_id = records[-1][0]
+            if not self.first_id:
+                self.first_id = records[0][0]
+        self.has_after = len(records) == self.page_size
+        self.trim_front()
+
+    def fetch_before(self):
+        if not self.has_before or self.loading:
+            return
+        self.fetch_page(self.prepend_page, before_id=self.first_id)
+
+    @timed("ui.record_table.prepend_page")
+    def prepend_page(self, records):
+        count("ui.record_table.rows_fetched", len(records))
+        self.loading = False
+        # A full page from the query means there may be more above, however many rows are new
+        self.has_before = len(records) == self.page_size
+        records = [record for record in records if not self.tree.exists(str(record[0]))]
+        for index, record in enumerate(records):
+            self.tree.insert("", index, iid=str(record[0]), values=record)
+        if records:
+            self.first_id = records[0][0]
+            # Keep the previously visible rows in view after prepending
+            self.tree.yview_moveto(len(records) / len(self.tree.get_children()))
+        self.trim_back()
+
+    def trim_front(self):
+        children = self.tree.get_children()
+        excess = len(children) - self.max_rows
+        if excess <= 0:
+            return
+        top = self.tree.yview()[0] * len(children)
+        self.tree.delete(*children[:excess])
+        self.first_id = int(children[excess])
+        self.has_before = True
+        self.tree.yview_moveto(max(top - excess, 0) / self.max_rows)
+
+    def trim_back(self):
+        children = self.tree.get_children()
+        excess = len(children) - self.max_rows
+        if excess <= 0:
+            return
+        self.tree.delete(*children[-excess:])
+        self.last_id = int(children[-excess - 1])
+        self.has_after = True
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if float(last) >= 0.9:
+            self.fetch_after()
+        elif float(first) <= 0.1:
+            self.fetch_before()
+
+    # Incremental patches applied after a single write instead of a full reload
+    def patch(self, changes):
+        # Applies a batch of (op, id) changes with one query: every touched row is re-read and
+        # then inserted in id order, updated in place or removed
+        ids = list(dict.fromkeys(id for op, id in changes))
+        if not ids:
+            return
+        generation, where, params = self.generation, self.where, self.params
+
+        def on_done(records):
+            if generation == self.generation:
+                self.apply_records(ids, records)
+
+        self.executor.submit(lambda db_manager, task: db_manager.get_records(ids, where, params), on_done=on_done)
+
+    @timed("ui.record_table.apply_records")
+    def apply_records(self, ids, records):
+        for id in ids:
+            iid = str(id)
+            record = records.get(id)
+            if record is None:
+                if self.tree.exists(iid):
+                    self.tree.delete(iid)
+            elif self.tree.exists(iid):
+                self.tree.item(iid, values=record)
+            else:
+                self.insert_sorted(record)
+        self.trim_front()
+
+    def insert_sorted(self, record):
+        id = record[0]
+        if (self.has_before and id < self.first_id) or (self.has_after and id > self.last_id):
+            # Outside the materialized window; it arrives with the page that covers it
+            return
+        index = bisect_left([int(iid) for iid in self.tree.get_children()], id)
+        self.tree.insert("", index, iid=str(id), values=record)
+        self.last_id = max(self.last_id, id)
+        if not self.first_id or id < self.first_id:
+            self.first_id = id
@@ -0,0 +1,143 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from utils.profiling import span
+
+def callback_name(func):
+    return getattr(func, "__qualname__", type(func).__name__)
+
+class TaskCancelled(Exception):
+    pass
+
+class Task:
+    def __init__(self, messages, key, on_done, on_error, on_progress):
+        self.messages = messages
+        self.key = key
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def progress(self, value):
+        # Safe to call from the worker thread; delivered to on_progress on the Tk thread
+        self.messages.put((self, "progress", value))
+
+    def check(self):
+        # Called by long-running work between steps so cancelled tasks stop early
+        if self.cancelled:
+            raise TaskCancelled()
+
+class TaskExecutor:
+    # Runs work(db_manager, task) on worker threads; DatabaseManager gives each worker its own
+    # read connection. Results and progress come back through a queue drained on the Tk thread
+    # with root.after, so callbacks are always safe to touch widgets.
+    def __init__(self, root, db_manager, workers=2, poll_interval=16):
+        self.root = root
+        self.db_manager = db_manager
+        self.poll_interval = poll_interval
+        self.messages = queue.Queue()
+        self.readers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db-reader")
+        # Writes go through a single thread so they commit in the order they were submitted
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self.latest = {}
+        self.active = 0
+        self.on_busy = None
+        # Databases replaced by set_db_manager, closed once no task can still be using them
+        self.retired = []
+        self.root.after(self.poll_interval, self.poll)
+
+    def submit(self, work, on_done=None, on_error=None, on_progress=None, key=None, write=False):
+        # A new task with the same key cancels the previous one; its result is discarded
+        task = Task(self.messages, key, on_done, on_error, on_progress)
+        if key is not None:
+            previous = self.latest.get(key)
+            if previous is not None:
+                previous.cancel()
+            self.latest[key] = task
+
+        self.active += 1
+        if self.active == 1:
+            self.notify_busy(True)
+        pool = self.writer if write else self.readers
+        # Bound now so a task keeps its database even if the profile is switched meanwhile
+        pool.submit(self.run, task, work, self.db_manager)
+        return task
+
+    def submit_write(self, work, on_done=None, on_error=None, on_progress=None, key=None):
+        return self.submit(work, on_done, on_error, on_progress, key, write=True)
+
+    def set_db_manager(self, db_manager):
+        # Pending keyed tasks belong to the old database, so their results are dropped
+        for task in self.latest.values():
+            task.cancel()
+        self.retired.append(self.db_manager)
+        self.db_manager = db_manager
+        if self.active == 0:
+            self.close_retired()
+
+    def close_retired(self):
+        for db_manager in self.retired:
+            db_manager.close()
+        self.retired = []
+
+    def run(self, task, work, db_manager):
+        if task.cancelled:
+            self.messages.put((task, "cancelled", None))
+            return
+        try:
+            with span(callback_name(work), "task"):
+                result = work(db_manager, task)
+        except TaskCancelled:
+            self.messages.put((task, "cancelled", None))
+        except Exception as e:
+            self.messages.put((task, "error", e))
+        else:
+            self.messages.put((task, "done", result))
+
+    def poll(self):
+        # Reschedule first so an exception raised by a callback does not stop the polling
+        self.root.after(self.poll_interval, self.poll)
+        try:
+            while True:
+                task, kind, value = self.messages.get_nowait()
+                if kind == "progress":
+                    if not task.cancelled and task.on_progress is not None:
+                        with span(callback_name(task.on_progress)):
+                            task.on_progress(value)
+                    continue
+                self.finish(task, kind, value)
+        except queue.Empty:
+            pass
+
+    def finish(self, task, kind, value):
+        self.active -= 1
+        if self.active == 0:
+            self.notify_busy(False)
+            self.close_retired()
+        if task.key is not None and self.latest.get(task.key) is task:
+            del self.latest[task.key]
+
+        if task.cancelled or kind == "cancelled":
+            return
+        if kind == "error":
+            if task.on_error is not None:
+                task.on_error(value)
+            else:
+                raise value
+        elif task.on_done is not None:
+            # Every UI refresh driven by a query result passes through here
+            with span(callback_name(task.on_done)):
+                task.on_done(value)
+
+    def notify_busy(self, busy):
+        if self.on_busy is not None:
+            self.on_busy(busy)
+
+    def shutdown(self):
+        for task in self.latest.values():
+            task.cancel()
+        self.readers.shutdown(wait=False, cancel_futures=True)
+        # Queued writes are user edits: let them commit before the database is closed
+        self.writer.shutdown(wait=True)
@@ -0,0 +1,60 @@
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import tkinter as tk
+from analytics.mmr import lttb
+from utils.profiling import timed
+
+class TrendChart:
+    # Rolling win rate on the left, win rate by MMR band on the right. Built once; slider moves
+    # only replace the line data and the bars.
+    def __init__(self, master):
+        self.dates = None
+
+        self.figure = Figure(figsize=(12, 4))
+        self.ax, self.band_ax = self.figure.subplots(1, 2, gridspec_kw={"width_ratios": (2, 1)})
+        self.line, = self.ax.plot([], [], linewidth=1.5)
+        self.ax.axhline(50, color="gray", linewidth=1, linestyle="--")
+
+        self.ax.set_title('Rolling winrate', fontsize=14, fontweight='bold')
+        self.ax.set_ylabel('Winrate (%)', fontsize=12)
+        self.ax.set_ylim(0, 100)
+        self.ax.xaxis.set_major_locator(MaxNLocator(8, integer=True))
+        self.ax.xaxis.set_major_formatter(FuncFormatter(self.format_date))
+        self.ax.tick_params(axis='x', labelrotation=45)
+        self.ax.grid(True, alpha=0.3)
+        self.band_ax.set_title('Winrate by MMR band', fontsize=14, fontweight='bold')
+
+        self.frame = tk.Frame(master)
+        self.canvas = FigureCanvasTkAgg(self.figure, self.frame)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def format_date(self, value, position):
+        index = int(round(value))
+        if self.dates is None or not 0 <= index < len(self.dates):
+            return ""
+        return str(self.dates[index])
+
+    @timed("ui.trend_chart.show")
+    def show(self, dates, rates, bands, width):
+        self.dates = dates
+        x = np.arange(len(rates), dtype=np.float64)
+        # Never draw more points than the axes has pixels
+        indices = lttb(x, rates, max(int(self.ax.bbox.width), 100))
+        self.line.set_data(x[indices], rates[indices])
+        self.ax.set_xlim(0, max(len(rates) - 1, 1))
+
+        self.band_ax.clear()
+        self.band_ax.set_title('Winrate by MMR band', fontsize=14, fontweight='bold')
+        if bands:
+            starts = [band[0] for band in bands]
+            self.band_ax.bar(starts, [band[3] for band in bands], width=width * 0.9, align="edge")
+            self.band_ax.axhline(50, color="gray", linewidth=1, linestyle="--")
+        self.band_ax.set_ylim(0, 100)
+        self.band_ax.set_xlabel('MMR', fontsize=12)
+        self.figure.tight_layout()
+        self.canvas.draw_idle()
@@ -1,30 +1,79 @@
+import os
+import queue
 import customtkinter as ctk
 from tkinter import ttk
 import sqlite3
 from datetime import datetime
 from db.db_manager import DatabaseManager
 from utils.validation import is_valid_record
-from ui.analysis_ui import AnalysisUI
-from tkinter import messagebox
+from ui.analysis_ui import AnalysisUI, prewarm
+from ui.record_table import RecordTable
+from ui.task_executor import TaskExecutor
+from ui.view_manager import ViewManager
+from ui.write_buffer import WriteBuffer
+from ui.debug_panel import DebugPanel
+from db.profiles import ProfileStore
+from db.search import SearchPlanner, SearchError, SEARCH_FIELDS
+from tkinter import messagebox, filedialog
+from db.importer import import_file
+from db.exporter import export_records, EXPORT_FORMATS
 
 class UIManager:
-    def __init__(self):
+    PACK_OPTIONS = dict(fill="both", expand=True, padx=10, pady=10)
+
+    def __init__(self, db_path=None):
         self.root = ctk.CTk()
         self.root.title("Parallel Self Tracker")
         self.root.geometry("1200x700")
         
-        self.db_manager = DatabaseManager()
-        self.db_manager.create_table()
+        # Opened here so migrations finish before the first window; all later queries go through the executor
+        self.db_manager = DatabaseManager(db_path)
+        self.profiles = ProfileStore(self.db_manager.config["profiles_dir"])
+        self.root.title(f"Parallel Self Tracker - {ProfileStore.name_of(self.db_manager.db_path)}")
+        self.executor = TaskExecutor(self.root, self.db_manager)
+        self.executor.on_busy = self.set_busy
+        self.search_job = None
+        
+        # Edits are buffered briefly and committed as one journal batch; each batch is one undo step
+        self.write_buffer = WriteBuffer(self.root, self.executor, self.on_flushed, on_error=self.on_write_error)
+        self.undo_stack = []
+        self.redo_stack = []
+        self.root.bind("<Control-z>", lambda event: self.undo())
+        self.root.bind("<Control-y>", lambda event: self.redo())
+        
+        # Timings and slow queries collected when started with PST_TRACE=1
+        self.debug_panel = DebugPanel(self.root)
+        self.root.bind("<F12>", lambda event: self.debug_panel.toggle())
 
-        self.analysis_ui = AnalysisUI(self, self.root, self.db_manager)
-        
-        self.setup_ui()
-        self.load_data()
+        self.analysis_ui = AnalysisUI(self, self.root, self.executor)
+        
+        # Each screen is built once; navigation only hides and shows them
+        self.views = ViewManager()
+        self.views.add("main", self)
+        self.views.add("analysis", self.analysis_ui)
+        self.main_frame = None
+        self.views.show("main")
+        
+        # Load the analysis dependencies in the background once the first window is up
+        if self.db_manager.config["prewarm_analysis"]:
+            self.root.after(500, prewarm)
+        # Load the column store on a worker so the first structured search does not wait for it
+        if self.db_manager.config["column_store"]:
+            self.root.after(500, lambda: self.executor.submit(lambda db_manager, task: db_manager.column_store()))
+
+        # Local ingestion server, started by main.py when a port is configured
+        self.ingest_server = None
+        self.ingested = queue.Queue()
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_exit)
 
     def on_exit(self):
         if messagebox.askyesno("Exit", "Do you want to quit the application?"):
+            self.write_buffer.flush()
+            if self.ingest_server is not None:
+                self.ingest_server.stop()
+            self.executor.shutdown()
+            self.db_manager.close()
             try:
                 self.root.destroy()
             except Exception as e:
@@ -33,12 +82,22 @@ class UIManager:
     def setup_ui(self):
         # Main Frame
         self.main_frame = ctk.CTkFrame(self.root)
-        self.main_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        self.main_frame.pack(**self.PACK_OPTIONS)
         
         # Left Frame
         left_frame = ctk.CTkFrame(self.main_frame, width=400)
         left_frame.pack(side="left", fill="y", padx=(0, 10))
         
+        # Profile Switcher: one database per player/account
+        profile_frame = ctk.CTkFrame(left_frame)
+        profile_frame.pack(fill="x", padx=10, pady=(10, 0))
+        ctk.CTkLabel(profile_frame, text="Profile:").pack(side="left", padx=5)
+        self.profile_var = ctk.StringVar(value=ProfileStore.name_of(self.db_manager.db_path))
+        self.profile_combo = ctk.CTkComboBox(profile_frame, values=self.profiles.names(), variable=self.profile_var,
+                                             width=160, command=self.switch_profile)
+        self.profile_combo.pack(side="left", padx=5)
+        ctk.CTkButton(profile_frame, text="New", width=50, command=self.new_profile).pack(side="left", padx=5)
+        
         # Title
         title_label = ctk.CTkLabel(left_frame, text="Data Input", font=("Arial", 16, "bold"))
         title_label.pack(pady=10)
@@ -119,27 +178,41 @@ class UIManager:
         nav_frame = ctk.CTkFrame(right_frame)
         nav_frame.pack(fill="x", padx=10, pady=10)
         
-        # Search Options
-        self.search_by_var = ctk.StringVar(value="my_paragon")
-        search_options = ["my_paragon", "opp_paragon", "turn_order", "result", "my_mmr", "date"]
-        search_combo = ctk.CTkComboBox(nav_frame, values=search_options, 
-                                     variable=self.search_by_var, width=150)
+        # Search Options: the field used for terms without a "field:" prefix
+        self.search_by_var = ctk.StringVar(value="all")
+        search_combo = ctk.CTkComboBox(nav_frame, values=SEARCH_FIELDS, 
+                                     variable=self.search_by_var, width=150,
+                                     command=lambda choice: self.schedule_search())
         search_combo.pack(side="left", padx=5)
         
-        # Search Input
+        # Search Input, e.g. "opp:Arak result:LOSE date:>=01/01/2026"
         self.search_var = ctk.StringVar()
         search_entry = ctk.CTkEntry(nav_frame, textvariable=self.search_var, 
                                    placeholder_text="Enter Search Condition", width=200)
         search_entry.pack(side="left", padx=5)
+        search_entry.bind("<Return>", lambda event: self.search_records())
+        self.search_var.trace_add("write", lambda *args: self.schedule_search())
         
         # Search Button
         search_btn = ctk.CTkButton(nav_frame, text="Search", command=self.search_records, width=80)
         search_btn.pack(side="left", padx=5)
         
         # Show All Button
-        showall_btn = ctk.CTkButton(nav_frame, text="Show All", command=self.load_data, width=80)
+        showall_btn = ctk.CTkButton(nav_frame, text="Show All", command=self.show_all, width=80)
         showall_btn.pack(side="left", padx=5)
         
+        # Search Status
+        self.search_status_var = ctk.StringVar()
+        search_status = ctk.CTkLabel(nav_frame, textvariable=self.search_status_var, text_color="red")
+        search_status.pack(side="left", padx=5)
+        
+        # Busy Indicator
+        self.busy_bar = ctk.CTkProgressBar(nav_frame, mode="indeterminate", width=100)
+        self.busy_bar.pack(side="right", padx=5)
+        self.busy_bar.set(0)
+        self.busy_label = ctk.CTkLabel(nav_frame, text="")
+        self.busy_label.pack(side="right", padx=5)
+        
         # Treeview
         tree_frame = ctk.CTkFrame(right_frame)
         tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -158,7 +231,6 @@ class UIManager:
                     item_values = self.tree.item(item_iid, "values")
                     item_text = self.tree.item(item_iid, "text")
                     self.selected_ids.append(item_values[0])
-            print(self.selected_ids)
 
         self.tree.bind("<<TreeviewSelect>>", on_tree_select)
         
@@ -169,7 +241,7 @@ class UIManager:
         
         # Scrollbar
         scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.record_table = RecordTable(self.tree, scrollbar, self.executor)
         
         self.tree.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
@@ -188,6 +260,18 @@ class UIManager:
         delete_btn = ctk.CTkButton(button_frame, text="Delete Record", command=self.delete_record)
         delete_btn.pack(side="left", padx=5)
 
+        undo_btn = ctk.CTkButton(button_frame, text="Undo", command=self.undo, width=60)
+        undo_btn.pack(side="left", padx=5)
+        
+        redo_btn = ctk.CTkButton(button_frame, text="Redo", command=self.redo, width=60)
+        redo_btn.pack(side="left", padx=5)
+
+        import_btn = ctk.CTkButton(button_frame, text="Import", command=self.import_records)
+        import_btn.pack(side="left", padx=5)
+
+        self.export_btn = ctk.CTkButton(button_frame, text="Export", command=self.export_records)
+        self.export_btn.pack(side="left", padx=5)
+
         # Analysis Button
         analysis_btn = ctk.CTkButton(button_frame, text="Analysis", command=self.open_analysis_window)
         analysis_btn.pack(side="left", padx=5)
@@ -195,79 +279,180 @@ class UIManager:
         self.load_data()
         
     def load_data(self):
-        # Clear Existing Data
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.record_table.reset()
             
-        records = self.db_manager.get_all_records()
-        
-        for record in records:
-            self.tree.insert("", "end", values=record)
+    def show_all(self):
+        self.search_var.set("")
+        self.search_records()
+            
+    def schedule_search(self, delay=250):
+        # Debounce search-as-you-type: only the last keystroke within the delay runs a query
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(delay, self.search_records)
             
     def search_records(self):
-        search_term = self.search_var.get()
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+            self.search_job = None
+        
+        text = self.search_var.get()
         search_by = self.search_by_var.get()
         
-        if not search_term:
-            self.load_data()
-            return
-            
-        # Clear Existing Data
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        def on_done(plan):
+            self.search_status_var.set("")
+            self.record_table.reset(*plan)
         
-        records = self.db_manager.fetch_all(f"SELECT * FROM records WHERE {search_by} LIKE ? ORDER BY id", 
-                                            (f"%{search_term}%",))
+        def on_error(error):
+            if not isinstance(error, SearchError):
+                raise error
+            self.search_status_var.set(str(error))
         
-        for record in records:
-            self.tree.insert("", "end", values=record)
+        # Planning looks up paragon names, so it runs on a worker like every other query
+        self.executor.submit(lambda db_manager, task: SearchPlanner(db_manager).plan(text, search_by),
+                             on_done=on_done, on_error=on_error, key="search")
+            
+    def set_busy(self, busy):
+        if busy:
+            self.busy_bar.start()
+        else:
+            self.busy_bar.stop()
+            self.busy_bar.set(0)
+            self.busy_label.configure(text="")
+            
+    def read_form(self):
+        return (self.my_paragon_var.get(), self.opp_paragon_var.get(), self.turn_order_var.get(),
+                self.result_var.get(), self.my_mmr_var.get(), self.date_var.get())
             
     def add_record(self):
-        my_paragon = self.my_paragon_var.get()
-        opp_paragon = self.opp_paragon_var.get()
-        turn_order = self.turn_order_var.get()
-        result = self.result_var.get()
-        my_mmr = self.my_mmr_var.get()
-        date = self.date_var.get()
-        print(my_paragon, opp_paragon, turn_order, result, my_mmr, date)
-        
-        if not is_valid_record((my_paragon, opp_paragon, turn_order, result, my_mmr, date)):
+        record = self.read_form()
+        
+        if not is_valid_record(record):
             messagebox.showerror("Invalid Input", "Please check your input")
             return
 
-        self.db_manager.insert_record((my_paragon, opp_paragon, turn_order, result, my_mmr, date))
-        
         self.clear_entries()
-        self.load_data()
+        self.write_buffer.add(("insert", record))
         
     def update_record(self):
         if not self.selected_ids:
             return
             
-        my_paragon = self.my_paragon_var.get()
-        opp_paragon = self.opp_paragon_var.get()
-        turn_order = self.turn_order_var.get()
-        result = self.result_var.get()
-        my_mmr = self.my_mmr_var.get()
-        date = self.date_var.get()
-        
-        if not is_valid_record((my_paragon, opp_paragon, turn_order, result, my_mmr, date)):
+        record = self.read_form()
+        id = int(self.selected_ids[0])
+        
+        if not is_valid_record(record):
             return
         
-        self.db_manager.update_record((my_paragon, opp_paragon, turn_order, result, my_mmr, date), self.selected_ids[0])
-
         self.clear_entries()
-        self.load_data()
+        self.write_buffer.add(("update", id, record))
         
     def delete_record(self):
         if not self.selected_ids:
             return
         
-        self.db_manager.delete_record(self.selected_ids)
-
+        ids = [int(id) for id in self.selected_ids]
+        self.selected_ids = []
         self.clear_entries()
+        self.write_buffer.add(("delete", ids))
+        
+    def on_flushed(self, db_manager, batch, changes):
+        # A flush that finishes after a profile switch belongs to the old database; its batch
+        # number means something else in the new one and must never reach the undo stack
+        if db_manager is not self.db_manager:
+            return
+        self.record_table.patch(changes)
+        if batch is not None:
+            self.undo_stack.append(batch)
+            self.redo_stack = []
+        
+    def on_write_error(self, error):
+        messagebox.showerror("Save Failed", str(error))
         self.load_data()
         
+    def undo(self):
+        # Edits still waiting in the buffer were never written, so undoing them just drops them
+        if self.write_buffer.discard():
+            return
+        if self.write_buffer.busy() or not self.undo_stack:
+            return
+        self.revert(self.undo_stack.pop(), self.redo_stack)
+        
+    def redo(self):
+        if self.write_buffer.busy() or not self.redo_stack:
+            return
+        self.revert(self.redo_stack.pop(), self.undo_stack)
+        
+    def revert(self, batch, stack):
+        # The reverting batch is itself journaled; reverting it again is the opposite action
+        def work(db_manager, task):
+            return db_manager, db_manager.revert_batch(batch)
+        
+        def on_done(result):
+            db_manager, (new_batch, changes) = result
+            if db_manager is not self.db_manager:
+                return
+            if new_batch is not None:
+                stack.append(new_batch)
+            self.record_table.patch(changes)
+        
+        self.executor.submit_write(work, on_done=on_done, on_error=self.on_write_error)
+        
+    def import_records(self):
+        path = filedialog.askopenfilename(title="Import Match History",
+                                          filetypes=[("Match history", "*.csv *.jsonl *.ndjson"), ("All files", "*.*")])
+        if not path:
+            return
+        
+        def work(db_manager, task):
+            def progress(report):
+                task.check()
+                task.progress(report.inserted)
+            return import_file(db_manager, path, progress=progress)
+        
+        def on_done(report):
+            message = report.summary()
+            for line, reason in report.rejected[:10]:
+                message += f"\nline {line}: {reason}"
+            messagebox.showinfo("Import Finished", message)
+            self.load_data()
+        
+        def on_error(error):
+            if not isinstance(error, (OSError, ValueError)):
+                raise error
+            messagebox.showerror("Import Failed", str(error))
+        
+        self.executor.submit_write(work, on_done=on_done, on_error=on_error,
+                                   on_progress=lambda count: self.busy_label.configure(text=f"Imported {count}"))
+        
+    def export_records(self):
+        path = filedialog.asksaveasfilename(title="Export Records", defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Parquet", "*.parquet")])
+        if not path:
+            return
+        if not any(path.lower().endswith(extension) for extension in EXPORT_FORMATS):
+            messagebox.showerror("Export Failed", "Choose a .csv, .jsonl or .parquet file")
+            return
+        
+        self.export_btn.configure(state="disabled", text="Exporting...")
+        
+        def work(db_manager, task):
+            def progress(count):
+                task.check()
+                task.progress(count)
+            return export_records(db_manager, path, progress=progress)
+        
+        def on_done(count):
+            self.export_btn.configure(state="normal", text="Export")
+            messagebox.showinfo("Export Finished", f"{count} records written to {path}")
+        
+        def on_error(error):
+            self.export_btn.configure(state="normal", text="Export")
+            messagebox.showerror("Export Failed", str(error))
+        
+        self.executor.submit(work, on_done=on_done, on_error=on_error,
+                             on_progress=lambda count: self.busy_label.configure(text=f"Exported {count}"))
+        
     def clear_entries(self):
         self.opp_paragon_var.set("")
         self.my_mmr_var.set("")
@@ -275,12 +460,70 @@ class UIManager:
     def run(self):
         self.root.mainloop()
 
-    def reset_ui(self):
-        for widget in self.main_frame.winfo_children():
-            widget.destroy()
-            print(widget)
-        self.main_frame.pack_forget()
-
+    def new_profile(self):
+        name = ctk.CTkInputDialog(text="Profile name:", title="New Profile").get_input()
+        if name:
+            self.switch_profile(name.strip())
+        
+    def start_ingest_server(self, port):
+        from ingest.server import IngestServer
+        
+        self.ingest_server = IngestServer(self.ingest_records, port=port)
+        port = self.ingest_server.start()
+        self.root.after(100, self.poll_ingested)
+        return port
+        
+    def ingest_records(self, records):
+        # Server thread: written to whichever profile is open, then queued for the Tk thread
+        from ingest.server import write_records
+        
+        db_manager = self.db_manager
+        ids = write_records(db_manager, records)
+        self.ingested.put((db_manager, ids))
+        return ids
+        
+    def poll_ingested(self):
+        # Everything committed since the last poll becomes one table patch
+        self.root.after(100, self.poll_ingested)
+        changes = []
+        try:
+            while True:
+                db_manager, ids = self.ingested.get_nowait()
+                if db_manager is self.db_manager:
+                    changes.extend(("insert", id) for id in ids)
+        except queue.Empty:
+            pass
+        if changes:
+            self.record_table.patch(changes)
+        
+    def switch_profile(self, name):
+        try:
+            path = self.profiles.path(name)
+        except ValueError as e:
+            messagebox.showerror("Invalid Profile", str(e))
+            self.profile_var.set(ProfileStore.name_of(self.db_manager.db_path))
+            return
+        if os.path.abspath(path) == os.path.abspath(self.db_manager.db_path):
+            return
+        
+        # Buffered edits are submitted against the current profile before it is replaced; their
+        # results (and those of any revert still running) are dropped once it has been
+        self.write_buffer.flush()
+        self.undo_stack = []
+        self.redo_stack = []
+        
+        # Opening runs migrations (or creates the file), so it happens before anything is swapped
+        os.makedirs(self.profiles.directory, exist_ok=True)
+        self.db_manager = DatabaseManager(path, self.db_manager.config)
+        self.executor.set_db_manager(self.db_manager)
+        self.analysis_ui.set_db_manager(self.db_manager)
+        
+        self.root.title(f"Parallel Self Tracker - {name}")
+        self.profile_combo.configure(values=self.profiles.names())
+        self.profile_var.set(name)
+        self.selected_ids = []
+        self.clear_entries()
+        self.show_all()
+        
     def open_analysis_window(self):
-        self.reset_ui()
-        self.analysis_ui.setup_ui()
+        self.views.show("analysis")
@@ -0,0 +1,34 @@
+class ViewManager:
+    # Screens are built on first show and then kept alive while hidden, so switching back
+    # keeps Treeview rows, scroll position and selection without rebuilding anything.
+    # A view needs setup_ui() that creates its main_frame and packs it with the view's
+    # PACK_OPTIONS; on_show() is optional and runs on every later show to refresh whatever
+    # changed while it was hidden. The options are never read back with pack_info(): those
+    # come out already scaled, and customtkinter would scale the padding again on every show.
+    def __init__(self):
+        self.views = {}
+        self.current = None
+
+    def add(self, name, view):
+        self.views[name] = view
+
+    def show(self, name):
+        view = self.views[name]
+        if view is self.current:
+            return
+        self.hide_current()
+
+        self.current = view
+        if getattr(view, "main_frame", None) is None:
+            view.setup_ui()
+            return
+        view.main_frame.pack(**view.PACK_OPTIONS)
+        on_show = getattr(view, "on_show", None)
+        if on_show is not None:
+            on_show()
+
+    def hide_current(self):
+        if self.current is None:
+            return
+        self.current.main_frame.pack_forget()
+        self.current = None
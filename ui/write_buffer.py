@@ -0,0 +1,74 @@
+class WriteBuffer:
+    # Edits made in quick succession are held for a short delay and then committed together:
+    # one transaction, one journal batch (so one undo step) and one table patch.
+    # Operations: ("insert", record), ("update", id, record), ("delete", ids)
+    # on_flushed(db_manager, batch, changes) gets the database the batch was written to
+    def __init__(self, root, executor, on_flushed, on_error=None, delay=300):
+        self.root = root
+        self.executor = executor
+        self.on_flushed = on_flushed
+        self.on_error = on_error
+        self.delay = delay
+        self.pending = []
+        self.job = None
+        self.in_flight = 0
+
+    def add(self, operation):
+        kind = operation[0]
+        if kind == "update":
+            # Only the last edit of a record matters
+            self.pending = [op for op in self.pending if not (op[0] == "update" and op[1] == operation[1])]
+        elif kind == "delete":
+            ids = set(operation[1])
+            self.pending = [op for op in self.pending if not (op[0] == "update" and op[1] in ids)]
+        self.pending.append(operation)
+
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+        self.job = self.root.after(self.delay, self.flush)
+
+    def discard(self):
+        # Drops edits that have not been written yet; True if there were any
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+        discarded, self.pending = bool(self.pending), []
+        return discarded
+
+    def busy(self):
+        return bool(self.pending) or self.in_flight > 0
+
+    def flush(self):
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+        if not self.pending:
+            return
+        operations, self.pending = self.pending, []
+        self.in_flight += 1
+
+        def work(db_manager, task):
+            changes = []
+            with db_manager.transaction() as cursor:
+                for operation in operations:
+                    if operation[0] == "insert":
+                        changes.append(("insert", db_manager.write_insert(cursor, operation[1])))
+                    elif operation[0] == "update":
+                        db_manager.write_update(cursor, operation[2], operation[1])
+                        changes.append(("update", operation[1]))
+                    else:
+                        changes.extend(("delete", id) for id in db_manager.write_delete(cursor, operation[1]))
+                batch = db_manager.current_batch()
+            return db_manager, batch, changes
+
+        def on_done(result):
+            self.in_flight -= 1
+            self.on_flushed(*result)
+
+        def on_error(error):
+            self.in_flight -= 1
+            if self.on_error is None:
+                raise error
+            self.on_error(error)
+
+        self.executor.submit_write(work, on_done=on_done, on_error=on_error)
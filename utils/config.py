@@ -0,0 +1,44 @@
+import json
+import os
+
+CONFIG_FILE = "config.json"
+
+DEFAULT_CONFIG = {
+    "db_path": os.path.join("db", "data_system.db"),
+    # Every .db file in this directory is a profile that can be switched to or combined
+    "profiles_dir": "db",
+    # Connection tuning applied to every SQLite connection
+    "synchronous": "NORMAL",
+    "cache_size_kib": 65536,
+    "mmap_size": 256 * 1024 * 1024,
+    "busy_timeout_ms": 5000,
+    # Keep analysis results in <db_path>.cache so they survive restarts (0 to disable)
+    "analysis_disk_cache": 1,
+    "analysis_cache_entries": 32,
+    # Import matplotlib and numpy in the background after startup (0 to load on first use)
+    "prewarm_analysis": 1,
+    # Answer structured searches and trends from in-memory columns with bitmap indexes (0 to always use SQL)
+    "column_store": 1,
+    # Accept match results over HTTP on 127.0.0.1 at this port (0 to disable; see ingest/server.py)
+    "ingest_port": 0,
+}
+
+# Environment overrides, e.g. PST_DB_PATH=/data/other.db
+ENV_PREFIX = "PST_"
+
+def load_config(path=CONFIG_FILE):
+    # Defaults, then config.json next to main.py, then PST_* environment variables
+    config = dict(DEFAULT_CONFIG)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as file:
+            overrides = json.load(file)
+        unknown = set(overrides) - set(DEFAULT_CONFIG)
+        if unknown:
+            raise ValueError(f"Unknown settings in {path}: {', '.join(sorted(unknown))}")
+        config.update(overrides)
+
+    for key, default in DEFAULT_CONFIG.items():
+        value = os.environ.get(ENV_PREFIX + key.upper())
+        if value is not None:
+            config[key] = int(value) if isinstance(default, int) else value
+    return config
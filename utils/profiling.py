@@ -0,0 +1,188 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+# Off unless PST_TRACE=1. When off, span() hands back one shared no-op object and the
+# decorators return the function unchanged, so instrumented code runs as if it were plain.
+ENABLED = os.environ.get("PST_TRACE", "") not in ("", "0")
+# Queries slower than this get their statements and EXPLAIN QUERY PLAN recorded
+SLOW_QUERY_MS = float(os.environ.get("PST_SLOW_QUERY_MS", "50"))
+# Write cProfile stats for the whole session to this file
+CPROFILE_PATH = os.environ.get("PST_CPROFILE")
+
+MAX_EVENTS = 100_000
+MAX_SLOW_QUERIES = 200
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_SPAN = NullSpan()
+
+class Span:
+    def __init__(self, profiler, name, category):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, self.category, self.start, time.perf_counter() - self.start)
+        return False
+
+class Profiler:
+    # Spans become counters (calls, total, max per name) and Chrome trace events
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.counters = {}
+        self.slow_queries = deque(maxlen=MAX_SLOW_QUERIES)
+        self.local = threading.local()
+
+    def record(self, name, category, start, duration):
+        event = (name, category, start - self.origin, duration, threading.get_ident())
+        with self.lock:
+            self.events.append(event)
+            counter = self.counters.get(name)
+            if counter is None:
+                self.counters[name] = [1, duration, duration]
+            else:
+                counter[0] += 1
+                counter[1] += duration
+                counter[2] = max(counter[2], duration)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            counter = self.counters.setdefault(name, [0, 0.0, 0.0])
+            counter[0] += amount
+
+    def trace_statement(self, sql):
+        # sqlite3 trace callback: statements run by this thread during the current query span
+        statements = getattr(self.local, "statements", None)
+        if statements is not None:
+            statements.append(sql)
+
+    def query(self, name, func, db_manager, args, kwargs):
+        # Nested queries (a method calling fetch_all) also report to the outer one
+        outer = getattr(self.local, "statements", None)
+        self.local.statements = statements = []
+        start = time.perf_counter()
+        try:
+            return func(db_manager, *args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            self.local.statements = outer
+            if outer is not None:
+                outer.extend(statements)
+            self.record(name, "sql", start, duration)
+            if duration * 1000 >= SLOW_QUERY_MS:
+                self.slow_query(name, duration, statements, db_manager)
+
+    def slow_query(self, name, duration, statements, db_manager):
+        entries = []
+        for sql in statements:
+            plan = None
+            if sql.lstrip().upper().startswith(("SELECT", "WITH")):
+                try:
+                    plan = [row[-1] for row in db_manager.reader().execute("EXPLAIN QUERY PLAN " + sql)]
+                except Exception as e:
+                    plan = [f"EXPLAIN failed: {e}"]
+            entries.append({"sql": sql, "plan": plan})
+        with self.lock:
+            self.slow_queries.append({"name": name, "ms": duration * 1000, "statements": entries})
+
+    def snapshot(self):
+        # [(name, calls, total_seconds, max_seconds)] sorted by total time, plus slow queries
+        with self.lock:
+            counters = sorted(((name, *counter) for name, counter in self.counters.items()),
+                              key=lambda row: -row[2])
+            return counters, list(self.slow_queries)
+
+    def reset(self):
+        with self.lock:
+            self.events.clear()
+            self.counters.clear()
+            self.slow_queries.clear()
+
+    def dump_counters(self, path):
+        counters, slow_queries = self.snapshot()
+        data = {
+            "counters": [{"name": name, "calls": calls, "total_ms": total * 1000, "max_ms": longest * 1000}
+                         for name, calls, total, longest in counters],
+            "slow_queries": slow_queries,
+        }
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2)
+
+    def dump_chrome_trace(self, path):
+        # Loadable in chrome://tracing or Perfetto
+        with self.lock:
+            events = list(self.events)
+        pid = os.getpid()
+        trace = [{"name": name, "cat": category, "ph": "X", "ts": start * 1e6, "dur": duration * 1e6,
+                  "pid": pid, "tid": tid} for name, category, start, duration, tid in events]
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, file)
+
+profiler = Profiler() if ENABLED else None
+
+def span(name, category="ui"):
+    if profiler is None:
+        return NULL_SPAN
+    return Span(profiler, name, category)
+
+def count(name, amount=1):
+    if profiler is not None:
+        profiler.count(name, amount)
+
+def timed(name, category="ui"):
+    # Decorator form of span(); a no-op when profiling is off
+    def decorate(func):
+        if profiler is None:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(profiler, name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def timed_query(name):
+    # For DatabaseManager methods: also captures the SQL they run when they are slow
+    def decorate(func):
+        if profiler is None:
+            return func
+
+        @wraps(func)
+        def wrapper(db_manager, *args, **kwargs):
+            return profiler.query(name, func, db_manager, args, kwargs)
+        return wrapper
+    return decorate
+
+def instrument_connection(conn):
+    if profiler is not None:
+        conn.set_trace_callback(profiler.trace_statement)
+
+def run_profiled(func):
+    # Runs func under cProfile when PST_CPROFILE names an output file
+    if not CPROFILE_PATH:
+        return func()
+    session = cProfile.Profile()
+    session.enable()
+    try:
+        return func()
+    finally:
+        session.disable()
+        session.dump_stats(CPROFILE_PATH)
@@ -1,21 +1,156 @@
-from datetime import datetime
+import json
+import os
+import re
+from array import array
+from functools import lru_cache
 
+DEFAULT_PARAGONS = ("Catherine", "Lemieux", "ADHQ",
+                    "Workshop", "Arak", "Jahn",
+                    "Brand", "Niamh", "NewDawn",
+                    "Nehemiah", "Gaffar", "Shoshanna",
+                    "Gnaeus", "Aetio", "Scipius")
+
+# Optional override: a JSON list of paragon names
+PARAGONS_FILE = os.path.join("db", "paragons.json")
+
+TURN_ORDERS = frozenset(("OTP", "OTD"))
+RESULTS = frozenset(("WIN", "LOSE"))
+
+DATE_PATTERN = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+# The column store keeps MMR as int32; anything larger is a typo, not a rating
+MAX_MMR = 2**31 - 1
+DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# Per-row error codes are bit flags so one pass can report every problem with a record
+ERR_MY_PARAGON = 1
+ERR_OPP_PARAGON = 2
+ERR_TURN_ORDER = 4
+ERR_RESULT = 8
+ERR_MMR = 16
+ERR_DATE = 32
+ERR_FIELD_COUNT = 64
+
+class ParagonRegistry:
+    def __init__(self, names):
+        self.names = tuple(names)
+        self.lookup = frozenset(self.names)
+
+    def __contains__(self, name):
+        return name in self.lookup
+
+    def __iter__(self):
+        return iter(self.names)
+
+    @classmethod
+    def load(cls, path=PARAGONS_FILE):
+        if not os.path.exists(path):
+            return cls(DEFAULT_PARAGONS)
+        with open(path, encoding="utf-8") as file:
+            names = json.load(file)
+        if not isinstance(names, list) or not all(isinstance(name, str) and name for name in names):
+            raise ValueError(f"{path} must contain a JSON list of paragon names")
+        return cls(names)
+
+registry = None
+
+def get_paragon_registry():
+    # Loaded once on first use and shared by every validation afterwards
+    global registry
+    if registry is None:
+        registry = ParagonRegistry.load()
+    return registry
+
+def set_paragon_registry(new_registry):
+    global registry
+    registry = new_registry
+
+@lru_cache(maxsize=4096)
 def is_valid_date(date_string):
-    try:
-        datetime.strptime(date_string, "%d/%m/%Y")
-        return True
-    except ValueError:
+    # Same rule as strptime(date_string, "%d/%m/%Y") without its per-call overhead
+    match = DATE_PATTERN.fullmatch(date_string) if isinstance(date_string, str) else None
+    if match is None:
+        return False
+    day, month, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+    if year < 1 or not 1 <= month <= 12:
+        return False
+    days = DAYS_IN_MONTH[month - 1]
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        days = 29
+    return 1 <= day <= days
+
+def is_valid_mmr(mmr):
+    if isinstance(mmr, str) and mmr.isdecimal():
+        mmr = int(mmr)
+    elif isinstance(mmr, bool) or not isinstance(mmr, int):
         return False
+    return 0 <= mmr <= MAX_MMR
+
+def validate_batch(columns):
+    # columns: six equal-length sequences (my_paragon, opp_paragon, turn_order, result, my_mmr, date).
+    # Returns one error code per row, 0 when the row is valid.
+    if len(columns) != 6:
+        raise ValueError(f"expected 6 columns, got {len(columns)}")
+    my_paragons, opp_paragons, turn_orders, results, mmrs, dates = columns
+    paragons = get_paragon_registry().lookup
+
+    codes = array("B", bytes(len(my_paragons)))
+    checks = (
+        (my_paragons, paragons.__contains__, ERR_MY_PARAGON),
+        (opp_paragons, paragons.__contains__, ERR_OPP_PARAGON),
+        (turn_orders, TURN_ORDERS.__contains__, ERR_TURN_ORDER),
+        (results, RESULTS.__contains__, ERR_RESULT),
+        (mmrs, is_valid_mmr, ERR_MMR),
+        (dates, is_valid_date, ERR_DATE),
+    )
+    for column, is_valid, flag in checks:
+        for index, valid in enumerate(map(is_valid, column)):
+            if not valid:
+                codes[index] |= flag
+    return codes
+
+def describe_error(code, record):
+    # Reason for the first failing field, worded for import reports and messages
+    if code & ERR_FIELD_COUNT:
+        return f"expected 6 fields, got {len(record)}"
+    if code & ERR_MY_PARAGON:
+        return f"unknown paragon '{record[0]}'"
+    if code & ERR_OPP_PARAGON:
+        return f"unknown opponent paragon '{record[1]}'"
+    if code & ERR_TURN_ORDER:
+        return f"turn order must be OTP or OTD, got '{record[2]}'"
+    if code & ERR_RESULT:
+        return f"result must be WIN or LOSE, got '{record[3]}'"
+    if code & ERR_MMR:
+        return f"MMR must be an integer from 0 to {MAX_MMR}, got '{record[4]}'"
+    if code & ERR_DATE:
+        return f"date must be dd/mm/YYYY, got '{record[5]}'"
+    return None
 
 def is_valid_record(record):
-    Paragon_list = ["Catherine", "Lemieux", "ADHQ", 
-                    "Workshop", "Arak", "Jahn", 
-                    "Brand", "Niamh", "NewDawn",
-                    "Nehemiah", "Gaffar", "Shoshanna",
-                    "Gnaeus", "Aetio", "Scipius"]
-    condition1 = record[0].isalpha() and record[1].isalpha() and record[0] in Paragon_list and record[1] in Paragon_list
-    condition2 = record[2] in ["OTP", "OTD"]
-    condition3 = record[3] in ["WIN", "LOSE"]
-    condition4 = record[4].isdigit() and int(record[4]) >= 0
-    condition5 = is_valid_date(record[5])
-    return condition1 and condition2 and condition3 and condition4 and condition5
\ No newline at end of file
+    return record_error(record) is None
+
+def record_error(record):
+    # Reason the record is invalid, or None when it can be stored
+    if len(record) != 6:
+        return describe_error(ERR_FIELD_COUNT, record)
+    return describe_error(validate_batch([(value,) for value in record])[0], record)
+
+def validate_records(records):
+    # (index, reason) for every invalid record in the batch
+    errors = []
+    well_formed = []
+    positions = []
+    for index, record in enumerate(records):
+        if len(record) != 6:
+            errors.append((index, describe_error(ERR_FIELD_COUNT, record)))
+        else:
+            well_formed.append(record)
+            positions.append(index)
+
+    if well_formed:
+        codes = validate_batch(list(zip(*well_formed)))
+        for position, code in enumerate(codes):
+            if code:
+                errors.append((positions[position], describe_error(code, well_formed[position])))
+        errors.sort()
+    return errors